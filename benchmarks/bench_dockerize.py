@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+"""
+End to end benchmark of ``dockerize`` against a local stand-in Docker index.
+
+Every run executes ``Dockerize.handle`` in a fresh interpreter on a synthetic
+project tree, with the prompts answered from a script, and reports the wall
+time of each phase. Phases overlap where dockerize works concurrently, e.g.
+the index is fetched in the background while the settings are inspected, so
+they do not add up to the total.
+
+Results are compared against the JSON baselines in ``baselines/`` and the
+script exits with a non-zero status on a regression. Baselines are machine
+specific, refresh them with ``--update-baseline`` on the machine that runs
+the comparison.
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from bench_versions import synthetic_tags  # noqa: E402
+
+BENCHMARK_DIR = os.path.dirname(os.path.realpath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, 'baselines', 'dockerize.json')
+
+PHASES = ['settings_import', 'index_fetch', 'version_grouping', 'project_scan', 'rendering', 'total']
+
+# A phase regresses when it is this many times slower than the baseline,
+# and by at least MIN_REGRESSION_MS to ignore noise in the fast phases
+TOLERANCE = 1.5
+MIN_REGRESSION_MS = 5.0
+
+RUNS = 3
+
+# Tags per repository served by the stand-in index, and the index page size
+INDEX_REPOSITORIES = {
+    'ubuntu': 1500,
+    'postgres': 4000,
+    'redis': 2500,
+}
+INDEX_PAGE_SIZE = 100
+
+# Latency added to every index response, roughly that of the real index
+INDEX_LATENCY = 0.02
+
+# Synthetic trees: number of services, apps per service, modules per app and
+# files in ignored directories such as node_modules and virtualenvs
+PROJECT_TREES = {
+    'small': {'services': 0, 'apps': 2, 'modules': 5, 'ignored_files': 0},
+    'medium': {'services': 0, 'apps': 40, 'modules': 25, 'ignored_files': 2000},
+    'monorepo': {'services': 12, 'apps': 40, 'modules': 25, 'ignored_files': 20000},
+}
+
+REQUIREMENTS = {
+    'requirements.txt': '-r requirements-base.txt\ngunicorn\n',
+    'requirements-base.txt': 'Django>=2.0\npsycopg2\ndjango-redis\nPillow\nlxml\n',
+}
+
+SETTINGS = '''import os
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SECRET_KEY = 'benchmark'
+INSTALLED_APPS = {apps!r}
+DATABASES = {{
+    'default': {{'ENGINE': 'django.db.backends.postgresql_psycopg2', 'NAME': 'application'}},
+}}
+CACHES = {{
+    'default': {{'BACKEND': 'django_redis.cache.RedisCache', 'LOCATION': 'redis://cache:6379/0'}},
+}}
+STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+'''
+
+# Prompt answers by the start of the question, anything else takes the default
+# or, without one, the first choice
+ANSWERS = {
+    'What docker image': 'ubuntu:16.04',
+    'Which application server': 'gunicorn',
+    'How many CPUs': '4',
+    'How much memory (in MB) does the production': '4096',
+    'Do you want a production compose file': 'Yes',
+}
+
+
+def write_file(path, content=''):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as file:
+        file.write(content)
+
+
+def write_django_project(base_dir, apps, modules):
+    app_names = ['app{}'.format(number) for number in range(apps)]
+    write_file(os.path.join(base_dir, 'manage.py'), '#!/usr/bin/env python\n')
+    write_file(os.path.join(base_dir, 'proj', '__init__.py'))
+    write_file(os.path.join(base_dir, 'proj', 'settings.py'), SETTINGS.format(apps=app_names))
+    write_file(os.path.join(base_dir, 'proj', 'wsgi.py'), 'application = None\n')
+    for app_name in app_names:
+        write_file(os.path.join(base_dir, app_name, '__init__.py'))
+        for number in range(modules):
+            write_file(os.path.join(base_dir, app_name, 'module{}.py'.format(number)), 'VALUE = {}\n'.format(number))
+        write_file(os.path.join(base_dir, app_name, 'migrations', '__init__.py'))
+
+
+def write_project_tree(base_dir, services, apps, modules, ignored_files):
+    write_django_project(base_dir, apps, modules)
+    for name, content in REQUIREMENTS.items():
+        write_file(os.path.join(base_dir, name), content)
+
+    # Other services of a monorepo, each with its own settings and entry points
+    for number in range(services):
+        write_django_project(os.path.join(base_dir, 'services', 'service{}'.format(number)), apps, modules)
+
+    # Files the project scan is expected to skip
+    ignored_dirs = [
+        os.path.join(base_dir, 'frontend', 'node_modules'),
+        os.path.join(base_dir, '.git', 'objects'),
+        os.path.join(base_dir, 'env', 'lib'),
+    ]
+    if ignored_files:
+        write_file(os.path.join(base_dir, 'env', 'pyvenv.cfg'), 'home = /usr/bin\n')
+    for number in range(ignored_files):
+        directory = ignored_dirs[number % len(ignored_dirs)]
+        write_file(os.path.join(directory, 'pkg{}'.format(number // 100), 'file{}.py'.format(number)))
+
+
+class IndexRequestHandler(BaseHTTPRequestHandler):
+    """Serves ``/v1/repositories/<repo>/tags`` in pages, like the Docker index."""
+    tags = {}
+
+    def do_GET(self):  # noqa: N802
+        parts = urlparse(self.path)
+        path_parts = parts.path.strip('/').split('/')
+        if len(path_parts) != 4 or path_parts[:2] != ['v1', 'repositories'] or path_parts[3] != 'tags':
+            return self.send_error(404)
+        tags = self.tags.get(path_parts[2])
+        if tags is None:
+            return self.send_error(404)
+
+        page = int(parse_qs(parts.query).get('page', ['1'])[0])
+        start = (page - 1) * INDEX_PAGE_SIZE
+        next_url = None
+        if start + INDEX_PAGE_SIZE < len(tags):
+            next_url = 'http://{}:{}{}?page={}'.format(
+                self.server.server_address[0], self.server.server_address[1], parts.path, page + 1)
+        body = json.dumps({
+            'count': len(tags),
+            'next': next_url,
+            'results': [{'name': tag} for tag in tags[start:start + INDEX_PAGE_SIZE]],
+        }).encode('utf-8')
+
+        time.sleep(INDEX_LATENCY)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class IndexServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def start_index_server():
+    IndexRequestHandler.tags = {
+        repo_name: synthetic_tags(num_tags, seed=seed)
+        for seed, (repo_name, num_tags) in enumerate(sorted(INDEX_REPOSITORIES.items()))
+    }
+    IndexRequestHandler.tags['ubuntu'].append('16.04')
+    server = IndexServer(('127.0.0.1', 0), IndexRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, 'http://127.0.0.1:{}/v1'.format(server.server_address[1])
+
+
+class PhaseTimer:
+    """
+    Records when wrapped callables run, per phase. The time of a phase is the
+    union of its intervals, so nested and concurrent calls count once.
+    """
+
+    def __init__(self):
+        self.intervals = defaultdict(list)
+
+    def wrap(self, owner, name, phase, after=None):
+        original = getattr(owner, name)
+
+        @functools.wraps(original)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = original(*args, **kwargs)
+                if after is not None:
+                    after(*args)
+                return result
+            finally:
+                self.intervals[phase].append((start, time.perf_counter()))
+
+        setattr(owner, name, wrapper)
+
+    def totals(self):
+        totals = {}
+        for phase, intervals in self.intervals.items():
+            total = 0.0
+            covered_until = None
+            for start, end in sorted(intervals):
+                if covered_until is not None and start < covered_until:
+                    start = covered_until
+                if end > start:
+                    total += end - start
+                covered_until = end if covered_until is None else max(covered_until, end)
+            totals[phase] = round(total * 1000, 2)
+        return totals
+
+
+def scripted_ask(question, default=None, choices=None, validator=None, newline=True):
+    answer = next((value for prefix, value in ANSWERS.items() if question.startswith(prefix)), None)
+    if isinstance(choices, dict):
+        if answer is None:
+            answer = default if default is not None else list(choices.values())[0]
+        answer = next((key for key, label in choices.items() if answer in (key, label)), answer)
+    elif answer is None:
+        answer = default if default is not None else choices[0]
+    if validator:
+        validator.validate(answer)
+    return answer
+
+
+def run_once(base_dir, index_url, cache_dir):
+    """Run dockerize once in this process and return the phase timings in ms."""
+    from djocker.scripts import dockerize
+    from djocker.utils.docker_index import DockerIndex, DockerIndexCache
+    from djocker.utils.project import ProjectIndex
+    from djocker.utils.versions import VersionIndex
+
+    timer = PhaseTimer()
+    # Django loads the settings module on first access
+    timer.wrap(dockerize.Dockerize, 'setup_django', 'settings_import',
+               after=lambda command: getattr(command.django_settings, 'DATABASES', None))
+    timer.wrap(DockerIndex, '_load_repo_tags', 'index_fetch')
+    for name in ['__init__', 'latest_per_minor', 'flavors_for']:
+        timer.wrap(VersionIndex, name, 'version_grouping')
+    timer.wrap(ProjectIndex, '_scan', 'project_scan')
+    timer.wrap(dockerize, 'run_handlers', 'rendering')
+
+    dockerize.ask = scripted_ask
+    dockerize.DockerIndex = functools.partial(DockerIndex, base_url=index_url,
+                                              cache=DockerIndexCache(cache_dir, ttl=0))
+
+    os.chdir(base_dir)
+    sys.argv = ['dockerize', '--djangosettings', 'proj.settings']
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        dockerize.Dockerize().handle()
+    timer.intervals['total'].append((start, time.perf_counter()))
+    return timer.totals()
+
+
+def run_in_subprocess(base_dir, index_url, cache_root):
+    cache_dir = tempfile.mkdtemp(dir=cache_root)
+    env = dict(os.environ, XDG_CACHE_HOME=cache_root)
+    output = subprocess.run(
+        [sys.executable, os.path.realpath(__file__), '--child', base_dir, '--index-url', index_url,
+         '--cache-dir', cache_dir],
+        env=env, stdout=subprocess.PIPE, universal_newlines=True, check=True,
+    ).stdout
+    return json.loads(output)
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_PATH, 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def find_regressions(results, baseline):
+    regressions = []
+    for tree, timings in sorted(results.items()):
+        for phase in PHASES:
+            expected = baseline.get(tree, {}).get(phase)
+            measured = timings.get(phase)
+            if expected is None or measured is None:
+                continue
+            if measured > expected * TOLERANCE and measured - expected > MIN_REGRESSION_MS:
+                regressions.append('{} {}: {:.2f} ms, baseline {:.2f} ms'.format(tree, phase, measured, expected))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trees', default=','.join(PROJECT_TREES),
+                        help='Comma separated trees to run, of {}'.format(', '.join(PROJECT_TREES)))
+    parser.add_argument('--runs', type=int, default=RUNS, help='Runs per tree, the best one is kept')
+    parser.add_argument('--update-baseline', action='store_true', help='Store the results as the new baseline')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--index-url', help=argparse.SUPPRESS)
+    parser.add_argument('--cache-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.stdout.write(json.dumps(run_once(args.child, args.index_url, args.cache_dir)))
+        return
+
+    server, index_url = start_index_server()
+    work_dir = tempfile.mkdtemp(prefix='djocker-bench-')
+    results = {}
+    try:
+        cache_root = os.path.join(work_dir, 'cache')
+        os.makedirs(cache_root)
+        for tree in args.trees.split(','):
+            base_dir = os.path.join(work_dir, tree)
+            write_project_tree(base_dir, **PROJECT_TREES[tree])
+            runs = [run_in_subprocess(base_dir, index_url, cache_root) for _ in range(args.runs)]
+            # Keep the best time of each phase to filter out noise from the machine
+            results[tree] = {phase: min(run.get(phase, 0.0) for run in runs) for phase in PHASES}
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    for tree, timings in results.items():
+        sys.stdout.write('{}: {}\n'.format(tree, ', '.join(
+            '{} {:.2f} ms'.format(phase, timings[phase]) for phase in PHASES)))
+
+    if args.update_baseline:
+        baseline = load_baseline()
+        baseline.update(results)
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, 'w') as file:
+            json.dump(baseline, file, indent=4, sort_keys=True)
+            file.write('\n')
+        sys.stdout.write('Baseline written to {}\n'.format(BASELINE_PATH))
+        return
+
+    regressions = find_regressions(results, load_baseline())
+    if regressions:
+        sys.stdout.write('Regressions against the baseline:\n')
+        for regression in regressions:
+            sys.stdout.write('  {}\n'.format(regression))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""
+Import time regression check for the manage_with_compose entry point.
+
+Exits with a non-zero status if importing the entry point takes longer than
+the budget, measured with ``python -X importtime`` in fresh interpreters.
+``-X importtime`` needs Python 3.7 or newer.
+"""
+import subprocess
+import sys
+from os import path
+
+MODULE = 'djocker.scripts.manage_with_compose'
+BUDGET_MS = 10.0
+RUNS = 7
+
+ROOT = path.dirname(path.dirname(path.realpath(__file__)))
+
+
+def measure_import_ms(module):
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True, check=True,
+    ).stderr
+
+    for line in output.splitlines():
+        parts = [part.strip() for part in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000.0
+    raise RuntimeError('No import time reported for {}'.format(module))
+
+
+def main():
+    # Use the best run to filter out noise from the machine
+    best = min(measure_import_ms(MODULE) for _ in range(RUNS))
+    sys.stdout.write('{} import time: {:.2f} ms (budget {:.2f} ms)\n'.format(MODULE, best, BUDGET_MS))
+    if best > BUDGET_MS:
+        sys.stdout.write('Import time budget exceeded\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
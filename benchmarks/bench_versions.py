@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+import random
+import sys
+import timeit
+from os import path
+
+sys.path.insert(0, path.dirname(path.dirname(path.realpath(__file__))))
+
+from djocker.utils.versions import VersionIndex  # noqa: E402
+
+NUM_TAGS = 20000
+FLAVORS = ['alpine', 'slim', 'stretch', 'jessie']
+
+
+def synthetic_tags(num_tags=NUM_TAGS, seed=0):
+    rng = random.Random(seed)
+    tags = ['latest', 'alpine', 'slim']
+    while len(tags) < num_tags:
+        version = '{}.{}.{}'.format(rng.randint(1, 15), rng.randint(0, 30), rng.randint(0, 40))
+        tags.append(version)
+        if rng.random() < 0.5:
+            tags.append('{}-{}'.format(version, rng.choice(FLAVORS)))
+    rng.shuffle(tags)
+    return tags[:num_tags]
+
+
+def main():
+    tags = synthetic_tags()
+    number = 20
+
+    build = timeit.timeit(lambda: VersionIndex(tags), number=number) / number
+    version_index = VersionIndex(tags)
+    versions = version_index.latest_per_minor()
+    query = timeit.timeit(
+        lambda: [version_index.flavors_for(version) for version in versions], number=number
+    ) / number
+
+    sys.stdout.write('tags: {}, minor versions: {}\n'.format(len(tags), len(versions)))
+    sys.stdout.write('build index: {:.2f} ms\n'.format(build * 1000))
+    sys.stdout.write('flavor lookups: {:.3f} ms\n'.format(query * 1000))
+
+
+if __name__ == '__main__':
+    main()
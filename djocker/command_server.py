@@ -0,0 +1,306 @@
+"""
+Warm Django management command server.
+
+Run ``python -m djocker.command_server serve`` inside the application
+container to keep a process with Django already set up. Each command sent by
+``python -m djocker.command_server run -- <command>`` is run in a fork of
+that process, and its output is streamed back to the client.
+
+The client exits with ``FALLBACK_EXIT_CODE`` when the server can not run the
+command, so that callers can fall back to running ``manage.py`` directly.
+"""
+import argparse
+import io
+import json
+import os
+import re
+import signal
+import socket
+import struct
+import sys
+
+DEFAULT_SOCKET_PATH = '/tmp/djocker-command-server.sock'
+
+# EX_TEMPFAIL, used to tell the caller to run the command without the server
+FALLBACK_EXIT_CODE = 75
+
+# Commands that never prompt, and so can be proxied from a terminal
+NON_INTERACTIVE_COMMANDS = {
+    'check',
+    'diffsettings',
+    'dumpdata',
+    'help',
+    'inspectdb',
+    'loaddata',
+    'sendtestemail',
+    'showmigrations',
+    'sqlflush',
+    'sqlmigrate',
+    'sqlsequencereset',
+    'version',
+}
+
+NO_INPUT_OPTIONS = ('--noinput', '--no-input')
+
+FRAME_HEADER = struct.Struct('!cI')
+
+
+def send_frame(sock, channel, payload):
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    sock.sendall(FRAME_HEADER.pack(channel, len(payload)) + payload)
+
+
+def _recv_exactly(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def read_frame(sock):
+    header = _recv_exactly(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    channel, size = FRAME_HEADER.unpack(header)
+    payload = _recv_exactly(sock, size)
+    if payload is None:
+        return None
+    return channel, payload
+
+
+class FrameWriter(io.TextIOBase):
+    """File-like object that sends everything written to it as frames."""
+
+    def __init__(self, sock, channel):
+        self.sock = sock
+        self.channel = channel
+
+    def writable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+    def write(self, data):
+        if data:
+            send_frame(self.sock, self.channel, data)
+        return len(data)
+
+
+def get_settings_module():
+    """
+    Find the settings module the same way ``manage.py`` would.
+    """
+    if os.environ.get('DJANGO_SETTINGS_MODULE'):
+        return os.environ['DJANGO_SETTINGS_MODULE']
+
+    try:
+        with open('manage.py', 'r') as file:
+            match = re.search(r'''DJANGO_SETTINGS_MODULE['"]\s*,\s*['"]([\w.]+)['"]''', file.read())
+    except OSError:
+        return None
+    return match.group(1) if match else None
+
+
+class CommandServer:
+    def __init__(self, socket_path):
+        self.socket_path = socket_path
+        self.source_mtimes = {}
+
+    def setup_django(self):
+        settings_module = get_settings_module()
+        if settings_module:
+            os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+        sys.path.insert(0, os.getcwd())
+
+        import django
+        from django.db import connections
+
+        django.setup()
+
+        # Load every command up front so that forks start with them imported
+        from django.core.management import get_commands, load_command_class
+        for name, app_name in get_commands().items():
+            try:
+                load_command_class(app_name, name)
+            except Exception:
+                pass
+
+        # Connections must not be shared with the forked children
+        connections.close_all()
+        self.source_mtimes = self._get_source_mtimes()
+
+    def _get_source_mtimes(self):
+        project_root = os.path.join(os.getcwd(), '')
+        mtimes = {}
+        for module in list(sys.modules.values()):
+            path = getattr(module, '__file__', None)
+            if not path or not path.startswith(project_root):
+                continue
+            try:
+                mtimes[path] = os.stat(path).st_mtime
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def sources_changed(self):
+        for path, mtime in self.source_mtimes.items():
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    return True
+            except OSError:
+                if mtime is not None:
+                    return True
+        return False
+
+    def restart(self):
+        os.execv(sys.executable, [sys.executable, '-m', 'djocker.command_server', 'serve',
+                                  '--socket', self.socket_path])
+
+    def run_command(self, conn, request):
+        # Runs in the forked child. Prompts must not read the server's stdin
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.close(devnull)
+        sys.stdout = FrameWriter(conn, b'o')
+        sys.stderr = FrameWriter(conn, b'e')
+
+        from django.core.management import execute_from_command_line
+
+        exit_code = 0
+        try:
+            os.chdir(request.get('cwd') or os.getcwd())
+            execute_from_command_line(['manage.py'] + request['argv'])
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            import traceback
+            traceback.print_exc()
+            exit_code = 1
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+        send_frame(conn, b'x', str(exit_code))
+
+    def handle_connection(self, conn):
+        frame = read_frame(conn)
+        if frame is None:
+            return
+        request = json.loads(frame[1].decode('utf-8'))
+
+        if self.sources_changed():
+            # Let the client run the command directly while we reload the code
+            send_frame(conn, b'x', str(FALLBACK_EXIT_CODE))
+            conn.close()
+            self.restart()
+
+        if os.fork() == 0:
+            try:
+                self.server.close()
+                self.run_command(conn, request)
+            finally:
+                os._exit(0)
+
+    def serve(self):
+        self.setup_django()
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        # Let the kernel reap the forked children
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(self.socket_path)
+        self.server.listen(16)
+        sys.stderr.write('Serving management commands on {}\n'.format(self.socket_path))
+
+        try:
+            while True:
+                conn, _ = self.server.accept()
+                try:
+                    self.handle_connection(conn)
+                finally:
+                    conn.close()
+        finally:
+            self.server.close()
+            os.unlink(self.socket_path)
+
+
+def needs_terminal(argv):
+    """
+    Return whether the command has to run in a process of its own, as the
+    server does not forward the terminal or stdin.
+    """
+    command, args = argv[0], argv[1:]
+    if command == 'dbshell':
+        return True
+    if command == 'shell':
+        # shell -c runs its code without reading from stdin
+        return not any(arg.startswith('-c') or arg.startswith('--command') for arg in args)
+    if any(arg in NO_INPUT_OPTIONS for arg in args):
+        return False
+    # Any other command may prompt the user at the terminal
+    return command not in NON_INTERACTIVE_COMMANDS and sys.stdin.isatty()
+
+
+def run_client(socket_path, argv):
+    """
+    Run a management command through the server and return its exit code.
+    """
+    if not argv or needs_terminal(argv):
+        return FALLBACK_EXIT_CODE
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        return FALLBACK_EXIT_CODE
+
+    streams = {
+        b'o': getattr(sys.stdout, 'buffer', sys.stdout),
+        b'e': getattr(sys.stderr, 'buffer', sys.stderr),
+    }
+
+    with sock:
+        send_frame(sock, b'r', json.dumps({'argv': argv, 'cwd': os.getcwd()}))
+        while True:
+            frame = read_frame(sock)
+            if frame is None:
+                # The server went away in the middle of the command
+                return 1
+            channel, payload = frame
+            if channel == b'x':
+                return int(payload)
+            streams[channel].write(payload)
+            streams[channel].flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm Django management command server',
+                                     usage='%(prog)s {serve,run} [--socket SOCKET] [-- command ...]')
+    parser.add_argument('action', choices=['serve', 'run'])
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH)
+
+    # Everything after -- is the management command, which argparse must not touch
+    argv = sys.argv[1:]
+    command = []
+    if '--' in argv:
+        index = argv.index('--')
+        argv, command = argv[:index], argv[index + 1:]
+    args = parser.parse_args(argv)
+
+    if args.action == 'serve':
+        CommandServer(args.socket).serve()
+        return
+
+    sys.exit(run_client(args.socket, command))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,37 @@
+import json
 import os
 from types import SimpleNamespace
 
-from six.moves import configparser
-
 CONFIG_SECTION = 'djocker'
+CONFIG_FILE = 'setup.cfg'
+
+
+def get_cache_root():
+    cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'djocker')
 
 
 def default_config_values():
     return {
         'python_bin': 'python3',
-        'compose_service_name': 'api'
+        'compose_service_name': 'api',
+        'index_cache_dir': os.path.join(get_cache_root(), 'index'),
+        'index_cache_ttl': '86400',
+        'image_catalog': os.path.join(get_cache_root(), 'catalog.sqlite3'),
+        'command_server': 'off',
+        'command_server_socket': '/tmp/djocker-command-server.sock',
+        'target_cpus': None,
+        'target_memory': None,
+        'cache_memory': None,
     }
 
 
-def get_config_parser():
-    file_path = os.path.join('.', 'setup.cfg')
+def get_config_parser(file_path=None):
+    # Imported here as most runs are answered from the parsed config cache
+    import configparser
+
+    if file_path is None:
+        file_path = os.path.join('.', CONFIG_FILE)
 
     parser = configparser.ConfigParser(allow_no_value=True)
     parser.read(file_path)
@@ -22,19 +39,76 @@ def get_config_parser():
     return parser
 
 
+def _get_parsed_config_cache_path(file_path):
+    # Hashed rather than flattened so that different paths never share a cache file
+    import hashlib
+
+    cache_name = hashlib.sha1(file_path.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(get_cache_root(), 'config', '{}.json'.format(cache_name))
+
+
+def get_config_values():
+    """
+    Return the values set in the djocker section of ``setup.cfg``.
+
+    The parsed values are cached on disk and reused for as long as the path,
+    modification time and size of ``setup.cfg`` stay the same.
+    """
+    file_path = os.path.abspath(CONFIG_FILE)
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return {}
+    key = {'path': file_path, 'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+
+    cache_path = _get_parsed_config_cache_path(file_path)
+    try:
+        with open(cache_path, 'r') as file:
+            cached = json.load(file)
+        if cached['key'] == key:
+            return cached['values']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    parser = get_config_parser(file_path)
+    values = dict(parser[CONFIG_SECTION]) if parser.has_section(CONFIG_SECTION) else {}
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temp_path = '{}.{}.tmp'.format(cache_path, os.getpid())
+        with open(temp_path, 'w') as file:
+            json.dump({'key': key, 'values': values}, file)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+
+    return values
+
+
 def get_djocker_config():
     djocker_config = default_config_values()
-    parser = get_config_parser()
+    values = get_config_values()
 
-    if not parser.has_section('djocker'):
-        return SimpleNamespace(**djocker_config)
+    for key in djocker_config.keys():
+        djocker_config[key] = values.get(key, djocker_config[key])
 
-    config_keys = djocker_config.keys()
+    return SimpleNamespace(**djocker_config)
 
-    for key in config_keys:
-        djocker_config[key] = parser[CONFIG_SECTION].get(key, djocker_config[key])
 
-    return SimpleNamespace(**djocker_config)
+class LazyConfig:
+    """
+    Reads the config on first attribute access rather than on import.
+    """
+
+    def __init__(self):
+        self._config = None
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._config is None:
+            self._config = get_djocker_config()
+        return getattr(self._config, name)
 
 
-config = get_djocker_config()
+config = LazyConfig()
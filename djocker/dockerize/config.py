@@ -1,4 +1,10 @@
+import os
+
+
 class DockerizeConfig:
+    # Stored relative to the base dir, so that saved answers survive moving the project
+    relative_paths = ['wsgi_path', 'asgi_path']
+
     def __init__(self, **kwargs):
         self.base_image = kwargs.get('base_image', None)
         self.operating_system = kwargs.get('operating_system', None)
@@ -6,9 +12,45 @@ class DockerizeConfig:
         self.database_type = kwargs.get('database_type', None)
         self.cache_image = kwargs.get('cache_image', None)
         self.cache_type = kwargs.get('cache_type', None)
+        self.cache_memory = kwargs.get('cache_memory', None)
         self.requirement_files = kwargs.get('requirement_files', None)
         self.base_dir = kwargs.get('base_dir', None)
         self.python_version = kwargs.get('python_version', None)
         self.application_server = kwargs.get('application_server', None)
         self.wsgi_dot_path = kwargs.get('uwsgi_dot_path', None)
         self.wsgi_path = kwargs.get('uwsgi_path', None)
+        self.asgi_dot_path = kwargs.get('asgi_dot_path', None)
+        self.asgi_path = kwargs.get('asgi_path', None)
+        self.multi_stage = kwargs.get('multi_stage', False)
+        self.collectstatic_at_build = kwargs.get('collectstatic_at_build', False)
+        self.connection_pooler = kwargs.get('connection_pooler', False)
+        self.database_workload = kwargs.get('database_workload', None)
+        self.database_memory = kwargs.get('database_memory', None)
+        self.production = kwargs.get('production', False)
+        self.api_replicas = kwargs.get('api_replicas', 1)
+        self.static_url = kwargs.get('static_url', None)
+        self.static_root = kwargs.get('static_root', None)
+        self.microcache = kwargs.get('microcache', False)
+        self.target_cpus = kwargs.get('target_cpus', None)
+        self.target_memory = kwargs.get('target_memory', None)
+
+    def to_dict(self):
+        """Return the answers as JSON serializable data, without the base dir."""
+        data = dict(vars(self))
+        base_dir = data.pop('base_dir')
+        for name in self.relative_paths:
+            if data.get(name) and base_dir:
+                data[name] = os.path.relpath(data[name], base_dir)
+        return data
+
+    @classmethod
+    def from_dict(cls, data, base_dir):
+        config = cls()
+        for name, value in data.items():
+            if hasattr(config, name):
+                setattr(config, name, value)
+        config.base_dir = base_dir
+        for name in cls.relative_paths:
+            if getattr(config, name):
+                setattr(config, name, os.path.join(base_dir, getattr(config, name)))
+        return config
@@ -1,15 +1,88 @@
 import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from djocker.config import get_cache_root
+from djocker.dockerize.state import content_hash, file_hash
+from djocker.dockerize.utils.constants import (
+    APPLICATION_SERVER_PACKAGES,
+    ASGI_APPLICATION_SERVERS,
+)
+from djocker.dockerize.utils.tuning import (
+    get_application_command,
+    get_host_resources,
+    get_tuning_profile,
+)
+from djocker.utils.colors import Colors, color
+from djocker.utils.file import get_file_mode
+from djocker.utils.requirements import RequirementsError, parse_requirements
+
+TEMPLATE_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+
+_jinja_env = None
+_jinja_env_lock = threading.Lock()
 
 
 class HandlerException(Exception):
     pass
 
 
+def _get_bytecode_cache():
+    cache_dir = os.path.join(get_cache_root(), 'templates')
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        return None
+    return FileSystemBytecodeCache(cache_dir)
+
+
+def get_jinja_env():
+    """
+    Return the template environment shared by all handlers in this process.
+
+    Compiled templates are kept in memory and in an on-disk bytecode cache, so
+    each template is only parsed once.
+    """
+    global _jinja_env
+    with _jinja_env_lock:
+        if _jinja_env is None:
+            _jinja_env = Environment(loader=FileSystemLoader(TEMPLATE_ROOT),
+                                     trim_blocks=True,
+                                     auto_reload=False,
+                                     cache_size=-1,
+                                     bytecode_cache=_get_bytecode_cache())
+    return _jinja_env
+
+
+def precompile_templates():
+    """Compile every template up front instead of on first use."""
+    jinja_env = get_jinja_env()
+    for template_name in jinja_env.list_templates(extensions=['j2']):
+        jinja_env.get_template(template_name)
+
+
+def run_handlers(handlers, state=None):
+    """
+    Render and write the output of several handlers concurrently, recording
+    the generated files in ``state`` when given.
+
+    Errors are raised in the order of ``handlers``.
+    """
+    for handler in handlers:
+        handler.state = state
+    precompile_templates()
+    with ThreadPoolExecutor(max_workers=len(handlers) or 1) as executor:
+        futures = [executor.submit(handler.handle) for handler in handlers]
+    return [future.result() for future in futures]
+
+
 class BaseHandler:
     template_file = None
     out_file = None
+    state = None
 
     def __init__(self, config):
         self.config = config
@@ -17,27 +90,100 @@ class BaseHandler:
         assert self.template_file, 'No template configured'
         assert self.out_file, 'No out file configured'
         self.template_root = self._get_template_root()
+        self._requirements = None
 
     @property
     def supported_python_versions(self):
         return []
 
     def _get_template_root(self):
-        current_path = os.path.dirname(os.path.abspath(__file__))
-        relative_template_path = '../templates'
-        return os.path.join(current_path, relative_template_path)
+        return TEMPLATE_ROOT
+
+    def get_requirements(self):
+        """
+        Parse the configured requirements files and everything they include.
+        """
+        if self._requirements is None:
+            paths = [os.path.join(self.config.base_dir, file) for file in self.config.requirement_files or []]
+            try:
+                self._requirements = parse_requirements(paths)
+            except RequirementsError as e:
+                raise HandlerException(str(e))
+        return self._requirements
+
+    def get_requirement_sources(self):
+        """
+        Return every requirements file that has to be added to the image,
+        relative to the base dir. Files outside of it are not in the build context.
+        """
+        base_dir = os.path.abspath(self.config.base_dir)
+        sources = [os.path.relpath(path, base_dir) for path in self.get_requirements().files]
+        return [source for source in sources if not source.startswith(os.pardir)]
+
+    def get_tuning_profile(self):
+        """
+        Size the application server for the target machine, or for this one
+        when no target is configured.
+        """
+        host_cpus, host_memory = get_host_resources()
+        return get_tuning_profile(self.config.target_cpus or host_cpus,
+                                  self.config.target_memory or host_memory,
+                                  self.get_requirements(),
+                                  asynchronous=self.is_asgi())
+
+    def is_asgi(self):
+        return self.config.application_server in ASGI_APPLICATION_SERVERS
+
+    def get_application_packages(self):
+        return APPLICATION_SERVER_PACKAGES.get(self.config.application_server, [])
+
+    def get_application_command(self):
+        dot_path = self.config.asgi_dot_path if self.is_asgi() else self.config.wsgi_dot_path
+        return get_application_command(self.config.application_server, dot_path, self.get_tuning_profile())
+
+    def get_template_file(self):
+        return self.template_file
 
     def build_template(self, data):
-        jinja_env = Environment(loader=FileSystemLoader(self.template_root),
-                                trim_blocks=True)
-        return jinja_env.get_template(self.template_file).render(**data)
+        return get_jinja_env().get_template(self.get_template_file()).render(**data)
 
     def write_template(self, data, executable=False):
         file_path = os.path.join(self.config.base_dir, self.out_file)
+        write_data = self.build_template(data).encode('utf-8')
+        digest = content_hash(write_data)
+        current_digest = file_hash(file_path)
+
+        # Leave files alone when nothing changed, so that their timestamps do too
+        if current_digest == digest:
+            print(color('{} (unchanged)'.format(file_path), Colors.OKBLUE))
+            if self.state is not None:
+                self.state.record(self.out_file, digest)
+            return
+
+        recorded_digest = self.state.files.get(self.out_file) if self.state is not None else None
+        if current_digest is not None and recorded_digest is not None and current_digest != recorded_digest:
+            print(color('{} has been edited since it was generated, not overwriting it'.format(file_path),
+                        Colors.WARNING))
+            self.state.record_modified(self.out_file)
+            return
+
         print(file_path)
-        write_data = self.build_template(data)
-        with open(file_path, 'w+') as file:
-            file.write(write_data)
+
+        # Write to a temporary file and rename it over the old one, so that
+        # a crash never leaves a half written file behind
+        file_dir = os.path.dirname(file_path)
+        fd, temp_path = tempfile.mkstemp(dir=file_dir, prefix='.{}.'.format(os.path.basename(file_path)))
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(write_data)
+            os.chmod(temp_path, get_file_mode(file_path, executable))
+            os.replace(temp_path, file_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        if self.state is not None:
+            self.state.record(self.out_file, digest)
 
     def handle(self):
         raise NotImplementedError
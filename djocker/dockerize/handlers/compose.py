@@ -1,28 +1,142 @@
+import json
+
 from djocker.dockerize.handlers.base import BaseHandler
 from djocker.dockerize.utils.constants import (
     CACHE_DEFAULT_PORT,
+    CACHE_ENV_VARS,
+    CACHE_HEALTHCHECK,
+    CONNECTION_POOLER_CONFIG_PATH,
+    CONNECTION_POOLER_IMAGE,
+    CONNECTION_POOLER_PORT,
     DATABASE_DEFAULT_CREDENTIALS,
     DATABASE_DEFAULT_PORT,
     DATABASE_ENV_VARS,
+    DATABASE_HEALTHCHECK,
     DATABASE_VOLUME_PATH,
+    NGINX_IMAGE,
+    NGINX_STATIC_ROOT,
+)
+from djocker.dockerize.utils.tuning import (
+    get_cache_command,
+    get_cache_memory,
+    get_connection_pool_sizes,
+    get_database_command,
+    get_database_settings,
+    get_deploy_resources,
+    get_host_resources,
 )
+from djocker.utils.versions import parse_version_tag
 
 
 class ComposeHandler(BaseHandler):
     template_file = 'docker-compose.j2'
     out_file = 'docker-compose.yml'
+    production = False
 
-    def handle(self):
-        data = {
+    def _get_healthcheck(self, healthchecks, service_type):
+        healthcheck = healthchecks.get(service_type)
+        return json.dumps(healthcheck) if healthcheck else None
+
+    def _get_pooler(self):
+        """
+        Return the connection pooler service put in front of the database,
+        or ``None`` when it is disabled or not available for the database.
+        """
+        db_type = self.config.database_type
+        if not self.config.connection_pooler or db_type not in CONNECTION_POOLER_IMAGE:
+            return None
+
+        pool_sizes = get_connection_pool_sizes(self.get_tuning_profile(), self.config.api_replicas)
+        env_vars = {}
+        if db_type == 'postgres':
+            env_vars = {
+                'DB_HOST': 'db',
+                'DB_PORT': DATABASE_DEFAULT_PORT[db_type],
+                'DB_USER': DATABASE_DEFAULT_CREDENTIALS['username'],
+                'DB_PASSWORD': DATABASE_DEFAULT_CREDENTIALS['password'],
+                'LISTEN_PORT': CONNECTION_POOLER_PORT[db_type],
+                'AUTH_TYPE': 'scram-sha-256',
+                'POOL_MODE': 'session',
+                'DEFAULT_POOL_SIZE': pool_sizes['pool_size'],
+                'MAX_CLIENT_CONN': pool_sizes['max_client_connections'],
+            }
+
+        return {
+            'image': CONNECTION_POOLER_IMAGE[db_type],
+            'port': CONNECTION_POOLER_PORT[db_type],
+            'env_vars': sorted(env_vars.items()),
+            'config_path': CONNECTION_POOLER_CONFIG_PATH.get(db_type),
+        }
+
+    def _get_database_command(self):
+        """
+        Return the command starting the database tuned for the configured
+        workload, or ``None`` to keep the image's stock configuration.
+        """
+        if not self.config.database_workload:
+            return None
+        memory_mb = self.config.database_memory or self.config.target_memory or get_host_resources()[1]
+        settings = get_database_settings(self.config.database_type, memory_mb, self.config.database_workload)
+        if not settings:
+            return None
+        return json.dumps(get_database_command(self.config.database_type, settings))
+
+    def _get_cache_command(self):
+        """
+        Return the command starting the cache with a memory limit and eviction
+        sized for the target machine.
+        """
+        if not self.config.cache_image:
+            return None
+        profile = self.get_tuning_profile()
+        memory_mb = self.config.cache_memory or get_cache_memory(profile['memory_mb'])
+        tag = self.config.cache_image.partition(':')[2]
+        parsed = parse_version_tag(tag) if tag else None
+        command = get_cache_command(self.config.cache_type, parsed[0] if parsed else None, int(memory_mb), profile)
+        return json.dumps(command) if command else None
+
+    def get_data(self):
+        pooler = self._get_pooler()
+        return {
             'db_image': self.config.database_image,
             'db_type': self.config.database_type,
             'db_env_vars': DATABASE_ENV_VARS.get(self.config.database_type),
             'db_port': DATABASE_DEFAULT_PORT.get(self.config.database_type),
             'db_credentials': DATABASE_DEFAULT_CREDENTIALS,
+            'db_command': self._get_database_command(),
             'db_volume_path': DATABASE_VOLUME_PATH.get(self.config.database_type),
+            'db_healthcheck': self._get_healthcheck(DATABASE_HEALTHCHECK, self.config.database_type),
             'cache_image': self.config.cache_image,
+            'cache_command': self._get_cache_command(),
+            'cache_env_vars': sorted(CACHE_ENV_VARS.get(self.config.cache_type, {}).items()),
+            'cache_healthcheck': self._get_healthcheck(CACHE_HEALTHCHECK, self.config.cache_type),
             'cache_port': CACHE_DEFAULT_PORT.get(self.config.cache_type),
+            'pooler': pooler,
+            'db_host': 'dbpool:{}'.format(pooler['port']) if pooler else 'db',
             'python_version': self.config.python_version,
+            'api_resources': get_deploy_resources(self.get_tuning_profile()),
+            'production': self.production,
         }
 
-        return self.write_template(data)
+    def handle(self):
+        return self.write_template(self.get_data())
+
+
+class ProductionComposeHandler(ComposeHandler):
+    """
+    Compose file running the api replicas on the application server behind
+    an nginx load balancer that serves the static files.
+    """
+    out_file = 'docker-compose.production.yml'
+    production = True
+
+    def get_data(self):
+        data = super().get_data()
+        data.update({
+            'api_replicas': self.config.api_replicas,
+            'collectstatic_at_build': self.config.collectstatic_at_build,
+            'static_root': self.config.static_root,
+            'nginx_image': NGINX_IMAGE,
+            'nginx_static_root': NGINX_STATIC_ROOT,
+        })
+        return data
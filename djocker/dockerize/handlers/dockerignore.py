@@ -0,0 +1,168 @@
+import os
+from fnmatch import fnmatch
+
+from djocker.dockerize.handlers.base import BaseHandler
+from djocker.utils.colors import Colors, color
+
+# Ignored wherever they appear in the build context
+ignore_anywhere = [
+    '.git',
+    '.hg',
+    '.svn',
+    '__pycache__',
+    '*.pyc',
+    '*.pyo',
+    'node_modules',
+    '.tox',
+    '.nox',
+    '.pytest_cache',
+    '.mypy_cache',
+    '*.egg-info',
+    '.coverage',
+    'htmlcov',
+    '.DS_Store',
+    '*.swp',
+]
+
+# Only ignored at the root of the build context
+ignore_top_level = [
+    '.venv',
+    'venv',
+    'env',
+    'media',
+    '.idea',
+    '.vscode',
+    'docker-compose.override.yml',
+    '.djocker.json',
+]
+
+HEADER = '# Generated by djocker'
+KEPT_HEADER = '# Kept from the existing .dockerignore'
+
+
+def format_size(num_bytes):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if num_bytes < 1024 or unit == 'GB':
+            break
+        num_bytes /= 1024.0
+    return '{:.1f} {}'.format(num_bytes, unit) if unit != 'B' else '{} B'.format(num_bytes)
+
+
+def is_virtualenv(path):
+    return os.path.isfile(os.path.join(path, 'pyvenv.cfg')) or \
+        os.path.isfile(os.path.join(path, 'bin', 'activate'))
+
+
+class DockerIgnoreHandler(BaseHandler):
+    template_file = 'dockerignore.j2'
+    out_file = '.dockerignore'
+
+    def _matches(self, name, patterns):
+        return any(fnmatch(name, pattern) for pattern in patterns)
+
+    def _get_entry_size(self, path, ignored):
+        """
+        Return the total and ignored size in bytes of a file or directory.
+        """
+        if os.path.isdir(path) and not os.path.islink(path):
+            return self._get_dir_size(path, ignored)
+
+        try:
+            size = os.lstat(path).st_size
+        except OSError:
+            # Temporary files of the handlers running alongside come and go
+            return 0, 0
+        return size, size if ignored else 0
+
+    def _get_dir_size(self, path, ignored):
+        total = 0
+        ignored_total = 0
+        for root, dirs, files in os.walk(path):
+            for name in files:
+                try:
+                    size = os.lstat(os.path.join(root, name)).st_size
+                except OSError:
+                    continue
+                total += size
+                if ignored or self._matches(name, ignore_anywhere):
+                    ignored_total += size
+            if not ignored:
+                # Walk ignored directories separately so that all of their files count as ignored
+                for name in [name for name in dirs if self._matches(name, ignore_anywhere)]:
+                    dirs.remove(name)
+                    dir_total, dir_ignored = self._get_dir_size(os.path.join(root, name), True)
+                    total += dir_total
+                    ignored_total += dir_ignored
+        return total, ignored_total
+
+    def get_context_profile(self):
+        """
+        Return ``(name, size, ignored size)`` for every top level entry of the
+        build context, largest first, together with the extra top level
+        directories that should be ignored.
+        """
+        base_dir = self.config.base_dir
+        profile = []
+        extra_ignores = []
+
+        for entry in sorted(os.listdir(base_dir)):
+            path = os.path.join(base_dir, entry)
+            ignored = self._matches(entry, ignore_anywhere + ignore_top_level)
+            if not ignored and os.path.isdir(path) and is_virtualenv(path):
+                ignored = True
+                extra_ignores.append(entry)
+            size, ignored_size = self._get_entry_size(path, ignored)
+            profile.append((entry, size, ignored_size))
+
+        profile.sort(key=lambda item: item[1], reverse=True)
+        return profile, extra_ignores
+
+    def print_profile(self, profile):
+        total = sum(size for name, size, ignored_size in profile)
+        saved = sum(ignored_size for name, size, ignored_size in profile)
+
+        print(color('\nBuild context size by top level entry:', Colors.HEADER))
+        for name, size, ignored_size in profile:
+            note = ''
+            if ignored_size == size and size:
+                note = color(' (ignored)', Colors.OKGREEN)
+            elif ignored_size:
+                note = color(' ({} ignored)'.format(format_size(ignored_size)), Colors.OKGREEN)
+            print('{:>12}  {}{}'.format(format_size(size), name, note))
+
+        print('\n.dockerignore saves {} of {} ({} bytes)\n'.format(
+            color(format_size(saved), Colors.BOLD), format_size(total), saved))
+
+    def get_kept_lines(self, generated_patterns):
+        """
+        Return the lines of an existing .dockerignore to keep in the generated
+        one: everything in a hand written file that is not generated anyway,
+        or the kept section of a file generated earlier.
+        """
+        try:
+            with open(os.path.join(self.config.base_dir, self.out_file), 'r') as file:
+                lines = [line.rstrip() for line in file]
+        except OSError:
+            return []
+
+        if KEPT_HEADER in lines:
+            return [line for line in lines[lines.index(KEPT_HEADER) + 1:] if line]
+        if lines and lines[0].startswith(HEADER):
+            return []
+        return [line for line in lines if line and line not in generated_patterns]
+
+    def handle(self):
+        profile, extra_ignores = self.get_context_profile()
+        self.print_profile(profile)
+
+        data = {
+            'header': HEADER,
+            'kept_header': KEPT_HEADER,
+            'ignore_anywhere': ignore_anywhere,
+            'ignore_top_level': ignore_top_level + extra_ignores,
+        }
+        generated_patterns = ['**/{}'.format(pattern) for pattern in data['ignore_anywhere']] + \
+            data['ignore_top_level']
+        data['kept_lines'] = self.get_kept_lines(generated_patterns)
+
+        self.write_template(data)
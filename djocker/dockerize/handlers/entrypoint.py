@@ -1,15 +1,34 @@
 from djocker.dockerize.handlers.base import BaseHandler
-from djocker.dockerize.utils.constants import DATABASE_DEFAULT_PORT
+from djocker.dockerize.utils.constants import (
+    CACHE_DEFAULT_PORT,
+    CONNECTION_POOLER_PORT,
+    DATABASE_DEFAULT_PORT,
+)
 
 
 class EntrypointHandler(BaseHandler):
     template_file = 'docker-entrypoint.j2'
     out_file = 'docker-entrypoint.sh'
 
+    def _get_dependencies(self):
+        """Return the name, host and port of every service to wait for."""
+        dependencies = []
+        db_port = DATABASE_DEFAULT_PORT.get(self.config.database_type)
+        if db_port:
+            dependencies.append(('Database', 'db', db_port))
+        pooler_port = CONNECTION_POOLER_PORT.get(self.config.database_type)
+        if self.config.connection_pooler and pooler_port:
+            dependencies.append(('Connection pooler', 'dbpool', pooler_port))
+        cache_port = CACHE_DEFAULT_PORT.get(self.config.cache_type)
+        if self.config.cache_image and cache_port:
+            dependencies.append(('Cache', 'cache', cache_port))
+        return dependencies
+
     def handle(self):
         data = {
-            'db_port': DATABASE_DEFAULT_PORT.get(self.config.database_type),
-            'python_version': self.config.python_version
+            'dependencies': self._get_dependencies(),
+            'python_version': self.config.python_version,
+            'collectstatic_at_build': self.config.collectstatic_at_build,
         }
 
         self.write_template(data, executable=True)
@@ -0,0 +1,22 @@
+from djocker.dockerize.handlers.base import BaseHandler
+from djocker.dockerize.utils.constants import NGINX_STATIC_ROOT
+
+
+class NginxHandler(BaseHandler):
+    template_file = 'nginx.conf.j2'
+    out_file = 'nginx.conf'
+
+    def handle(self):
+        static_url = self.config.static_url
+        profile = self.get_tuning_profile()
+        data = {
+            # Static files served from another host are left to it
+            'static_url': static_url if static_url and static_url.startswith('/') else None,
+            'static_root': NGINX_STATIC_ROOT,
+            'microcache': self.config.microcache,
+            'upstream_keepalive': profile['workers'] * self.config.api_replicas,
+            # Close idle connections before the application server does
+            'upstream_keepalive_timeout': max(profile['keep_alive'] - 1, 1),
+        }
+
+        return self.write_template(data)
@@ -0,0 +1,22 @@
+from djocker.dockerize.handlers.base import BaseHandler
+from djocker.dockerize.utils.constants import (
+    CONNECTION_POOLER_PORT,
+    DATABASE_DEFAULT_CREDENTIALS,
+    DATABASE_DEFAULT_PORT,
+)
+from djocker.dockerize.utils.tuning import get_connection_pool_sizes
+
+
+class ProxySQLHandler(BaseHandler):
+    template_file = 'proxysql.cnf.j2'
+    out_file = 'proxysql.cnf'
+
+    def handle(self):
+        data = {
+            'db_port': DATABASE_DEFAULT_PORT['mysql'],
+            'db_credentials': DATABASE_DEFAULT_CREDENTIALS,
+            'listen_port': CONNECTION_POOLER_PORT['mysql'],
+            'pool_sizes': get_connection_pool_sizes(self.get_tuning_profile(), self.config.api_replicas),
+        }
+
+        return self.write_template(data)
@@ -0,0 +1,110 @@
+import json
+
+from djocker.dockerize.handlers.base import BaseHandler, HandlerException
+from djocker.dockerize.utils.packages import (
+    get_system_packages,
+    load_system_packages,
+)
+from djocker.utils.versions import parse_version_tag
+
+# The official python images install the interpreter as ``python`` on the path
+python_info = {
+    'interpreter': 'python',
+    'pip': 'pip',
+}
+
+
+class PythonImageHandler(BaseHandler):
+    """
+    Base handler for the official ``python`` images, which come with the
+    interpreter already installed.
+
+    Shared libraries needed by compiled python dependencies are looked up from
+    the built extensions, so the package maps only list build time packages
+    and runtime packages that are not linked against.
+    """
+    multi_stage_template_file = None
+    system_packages = None
+    build_packages = []
+    runtime_packages = []
+
+    def get_template_file(self):
+        if self.config.multi_stage:
+            return self.multi_stage_template_file
+        return self.template_file
+
+    @property
+    def image_tag(self):
+        return self.config.base_image.partition(':')[2]
+
+    @property
+    def supported_python_versions(self):
+        parsed = parse_version_tag(self.image_tag)
+        if not parsed:
+            # Tags such as ``slim`` follow the latest Python 3 release
+            return ['3']
+        numbers, flavor = parsed
+        return ['.'.join(str(number) for number in numbers[:2])]
+
+    def _validate(self):
+        if self.config.python_version not in self.supported_python_versions:
+            raise HandlerException('Version {} of Python is not the one in {}'
+                                   .format(self.config.python_version, self.config.base_image))
+
+    def _get_package_data(self):
+        build_packages, runtime_packages = get_system_packages(load_system_packages(self.system_packages),
+                                                               self.get_requirements())
+        return {
+            'build_requirements': self.build_packages + build_packages,
+            'runtime_requirements': self.runtime_packages + runtime_packages,
+        }
+
+    def handle(self):
+        self._validate()
+
+        data = {
+            'base_image': self.config.base_image,
+            'package_data': self._get_package_data(),
+            'python': python_info,
+            'requirement_files': self.config.requirement_files,
+            'requirement_sources': self.get_requirement_sources(),
+            'application_packages': self.get_application_packages(),
+            'collectstatic_at_build': self.config.collectstatic_at_build,
+            'application_command': None,
+        }
+
+        application_command = self.get_application_command()
+        if application_command:
+            data['application_command'] = json.dumps(application_command)
+
+        self.write_template(data)
+
+
+class PythonSlimHandler(PythonImageHandler):
+    template_file = 'python-slim/Dockerfile.j2'
+    multi_stage_template_file = 'python-slim/Dockerfile.multistage.j2'
+    out_file = 'Dockerfile'
+    system_packages = 'debian'
+    build_packages = ['build-essential']
+    runtime_packages = [
+        'netcat-openbsd',  # For checking if a network service is up or not
+    ]
+
+
+class PythonAlpineHandler(PythonImageHandler):
+    """
+    Handler for the musl based Alpine images. Dependencies without musllinux
+    wheels are compiled from source against musl, so the build packages are
+    only kept until the wheels have been built.
+
+    The package map follows Alpine 3.15 and newer, e.g. ``libpq-dev`` for
+    psycopg2 was ``postgresql-dev`` on older releases.
+    """
+    template_file = 'python-alpine/Dockerfile.j2'
+    multi_stage_template_file = 'python-alpine/Dockerfile.multistage.j2'
+    out_file = 'Dockerfile'
+    system_packages = 'alpine'
+    build_packages = ['build-base', 'linux-headers']
+    runtime_packages = [
+        'netcat-openbsd',  # For checking if a network service is up or not
+    ]
@@ -1,13 +1,10 @@
-import os
+import json
 
 from djocker.dockerize.handlers.base import BaseHandler, HandlerException
-
-apt_package_requirements = {
-    'mysqlclient': ['libmysqlclient-dev'],
-    'cffi': ['libffi-dev'],
-    'pyopenssl': ['libssl-dev'],
-    'pysaml2': ['xmlsec1', 'libxmlsec1']
-}
+from djocker.dockerize.utils.packages import (
+    get_system_packages,
+    load_system_packages,
+)
 
 supported_ubuntu_versions = [
     '16.04',
@@ -16,12 +13,14 @@ supported_ubuntu_versions = [
 python_version_support = {
     '16.04': {
         '2.7': {
-            'packages': ['python-dev', 'python-pip'],
+            'packages': ['python', 'python-pip'],
+            'build_packages': ['python-dev'],
             'interpreter': 'python',
             'pip': 'pip',
         },
         '3.5': {
-            'packages': ['python3.5', 'python3-dev', 'python3-pip'],
+            'packages': ['python3.5', 'python3-pip'],
+            'build_packages': ['python3-dev'],
             'interpreter': 'python3.5',
             'pip': 'pip',
         }
@@ -31,12 +30,22 @@ python_version_support = {
 
 class UbuntuHandler(BaseHandler):
     template_file = 'ubuntu/Dockerfile.j2'
+    multi_stage_template_file = 'ubuntu/Dockerfile.multistage.j2'
     out_file = 'Dockerfile'
 
+    def get_template_file(self):
+        if self.config.multi_stage:
+            return self.multi_stage_template_file
+        return self.template_file
+
     @property
     def ubuntu_version(self):
         return self.config.base_image.split(':')[1].split('-')[0]
 
+    @property
+    def apt_package_requirements(self):
+        return load_system_packages('ubuntu-{}'.format(self.ubuntu_version))
+
     @property
     def python_info(self):
         return python_version_support[self.ubuntu_version][self.config.python_version]
@@ -58,31 +67,31 @@ class UbuntuHandler(BaseHandler):
         if not self.config.requirement_files:
             return None
 
-        apt_requirements = ['build-essential',
-                            'locales',
-                            'netcat',  # For checking if a network service is up or not
-                            ]
-        base_dir = self.config.base_dir
+        build_requirements = ['build-essential']
+        runtime_requirements = ['locales',
+                                'netcat',  # For checking if a network service is up or not
+                                ]
 
         # Get apt package requirements from requirements files
-        for requirements_file in self.config.requirement_files:
-            requirement_path = os.path.join(base_dir, requirements_file)
-            with open(requirement_path, 'r') as file:
-                requirements_content = file.read()
-                for package, requirements in apt_package_requirements.items():
-                    if package in requirements_content:
-                        apt_requirements += requirements
+        build_packages, runtime_packages = get_system_packages(self.apt_package_requirements,
+                                                               self.get_requirements())
+        build_requirements += build_packages
+        runtime_requirements += runtime_packages
 
         # Get python requirement
         python_info = self.python_info
 
-        apt_requirements += python_info.get('packages', [])
+        runtime_requirements += python_info.get('packages', [])
+        build_requirements += python_info.get('build_packages', []) + runtime_requirements
 
         deb_sources = python_info.get('deb_sources', [])
         deb_sign_keys = python_info.get('deb_sign_keys', [])
 
         apt_data = {
-            'requirements': apt_requirements,
+            # Everything is installed in the same image unless building in multiple stages
+            'requirements': build_requirements,
+            'build_requirements': build_requirements,
+            'runtime_requirements': runtime_requirements,
             'sources': deb_sources,
             'deb_keys': deb_sign_keys,
         }
@@ -96,8 +105,16 @@ class UbuntuHandler(BaseHandler):
             'apt_data': self._get_apt_data(),
             'python': self.python_info,
             'requirement_files': self.config.requirement_files,
+            'requirement_sources': self.get_requirement_sources(),
             'wsgi_dot_path': self.config.wsgi_dot_path,
-            'application_server': self.config.application_server
+            'application_server': self.config.application_server,
+            'application_packages': self.get_application_packages(),
+            'collectstatic_at_build': self.config.collectstatic_at_build,
+            'application_command': None,
         }
 
+        application_command = self.get_application_command()
+        if application_command:
+            data['application_command'] = json.dumps(application_command)
+
         self.write_template(data)
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from djocker.utils.file import get_file_mode
+
+STATE_FILE = '.djocker.json'
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path):
+    """Return the content hash of the file at ``path``, or ``None`` if it does not exist."""
+    try:
+        with open(path, 'rb') as file:
+            return content_hash(file.read())
+    except OSError:
+        return None
+
+
+class GenerationState:
+    """
+    The answers of the last dockerize run and the content hash of every file
+    it generated, kept in the base dir so that the files can be regenerated
+    without asking and hand edits can be told apart from generated content.
+    """
+
+    def __init__(self, base_dir, answers=None, files=None):
+        self.base_dir = base_dir
+        self.answers = answers
+        self.files = files or {}
+        # Files that were edited by hand since they were generated
+        self.modified = []
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return os.path.join(self.base_dir, STATE_FILE)
+
+    @classmethod
+    def load(cls, base_dir):
+        try:
+            with open(os.path.join(base_dir, STATE_FILE), 'r') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls(base_dir)
+        return cls(base_dir, data.get('answers'), data.get('files'))
+
+    def record(self, out_file, digest):
+        with self._lock:
+            self.files[out_file] = digest
+
+    def record_modified(self, out_file):
+        with self._lock:
+            self.modified.append(out_file)
+
+    def save(self):
+        data = json.dumps({
+            'answers': self.answers,
+            'files': self.files,
+        }, indent=4, sort_keys=True) + '\n'
+        try:
+            with open(self.path, 'r') as file:
+                if file.read() == data:
+                    return
+        except OSError:
+            pass
+
+        fd, temp_path = tempfile.mkstemp(dir=self.base_dir, prefix='{}.'.format(STATE_FILE))
+        try:
+            with os.fdopen(fd, 'w') as file:
+                file.write(data)
+            os.chmod(temp_path, get_file_mode(self.path))
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
@@ -16,6 +16,59 @@ DATABASE_ENV_VARS = {
     }
 }
 
+# Workloads the database server can be tuned for
+DATABASE_WORKLOADS = ["oltp", "read-heavy", "dev"]
+
+# Settings of each workload, memory ones as a share of the database server's memory
+DATABASE_TUNING_PROFILES = {
+    "mysql": {
+        "oltp": {
+            "buffer_pool": 0.7,
+            "max_connections": 300,
+            "flush_log_at_trx_commit": 1,
+        },
+        "read-heavy": {
+            "buffer_pool": 0.75,
+            "max_connections": 200,
+            "flush_log_at_trx_commit": 1,
+        },
+        "dev": {
+            "buffer_pool": 0.25,
+            "max_connections": 50,
+            "flush_log_at_trx_commit": 2,
+        },
+    },
+    "postgres": {
+        "oltp": {
+            "shared_buffers": 0.25,
+            "effective_cache_size": 0.75,
+            "max_connections": 300,
+            "work_mem_per_connection": 3,
+            "min_wal_size": "2GB",
+            "max_wal_size": "8GB",
+            "synchronous_commit": "on",
+        },
+        "read-heavy": {
+            "shared_buffers": 0.25,
+            "effective_cache_size": 0.75,
+            "max_connections": 200,
+            "work_mem_per_connection": 2,
+            "min_wal_size": "1GB",
+            "max_wal_size": "4GB",
+            "synchronous_commit": "on",
+        },
+        "dev": {
+            "shared_buffers": 0.0625,
+            "effective_cache_size": 0.25,
+            "max_connections": 50,
+            "work_mem_per_connection": 6,
+            "min_wal_size": "100MB",
+            "max_wal_size": "1GB",
+            "synchronous_commit": "off",
+        },
+    },
+}
+
 DATABASE_DEFAULT_PORT = {
     "mysql": "3306",
     "postgres": "5432",
@@ -26,7 +79,67 @@ CACHE_DEFAULT_PORT = {
     "memcached": "11211",
 }
 
+# Environment variables the api finds the cache with
+CACHE_ENV_VARS = {
+    "redis": {
+        "CACHE_URL": "redis://cache:{}/0".format(CACHE_DEFAULT_PORT["redis"]),
+        "REDIS_URL": "redis://cache:{}/0".format(CACHE_DEFAULT_PORT["redis"]),
+    },
+    "memcached": {
+        "CACHE_URL": "memcache://cache:{}".format(CACHE_DEFAULT_PORT["memcached"]),
+    },
+}
+
+# Evict the least recently used keys when the cache is full, like memcached does
+REDIS_MAXMEMORY_POLICY = "allkeys-lru"
+
+DATABASE_HEALTHCHECK = {
+    "mysql": ["CMD", "mysqladmin", "ping", "-h", "localhost",
+              "-u", DATABASE_DEFAULT_CREDENTIALS['username'], "-p" + DATABASE_DEFAULT_CREDENTIALS['password']],
+    "postgres": ["CMD", "pg_isready", "-U", DATABASE_DEFAULT_CREDENTIALS['username'], "-d", "application"],
+}
+
+# The memcached image ships no client to check itself with
+CACHE_HEALTHCHECK = {
+    "redis": ["CMD", "redis-cli", "ping"],
+}
+
+APPLICATION_SERVER_PACKAGES = {
+    "uwsgi": ["uwsgi"],
+    "gunicorn": ["gunicorn"],
+    "uvicorn": ["uvicorn", "uvloop", "httptools"],
+    "gunicorn-uvicorn": ["gunicorn", "uvicorn", "uvloop", "httptools"],
+}
+
+# Application servers that serve the ASGI application instead of the WSGI one
+ASGI_APPLICATION_SERVERS = ["uvicorn", "gunicorn-uvicorn"]
+
 DATABASE_VOLUME_PATH = {
     "mysql": "/var/lib/mysql",
     "postgres": "/var/lib/postgresql",
 }
+
+# Connection poolers put between the api and the database, keyed like DATABASE_DEFAULT_PORT
+CONNECTION_POOLER_IMAGE = {
+    "mysql": "proxysql/proxysql:2.0.12",
+    "postgres": "edoburu/pgbouncer:1.15.0",
+}
+
+CONNECTION_POOLER_PORT = {
+    "mysql": "6033",
+    "postgres": "6432",
+}
+
+# ProxySQL is configured through a mounted file, PgBouncer through its environment
+CONNECTION_POOLER_CONFIG_PATH = {
+    "mysql": "/etc/proxysql.cnf",
+}
+
+# Load balancer in front of the api replicas of the production compose file
+NGINX_IMAGE = "nginx:1.18-alpine"
+
+# Where STATIC_ROOT is mounted in the nginx container
+NGINX_STATIC_ROOT = "/srv/static"
+
+# Where the project is added in the application image
+CODE_ROOT = "/code"
@@ -0,0 +1,37 @@
+import json
+import os
+
+DATA_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+_system_packages = {}
+
+
+def load_system_packages(name):
+    """
+    Load the mapping from normalized python package names to the system
+    packages they need at build time and at runtime.
+
+    ``name`` is the name of a file in ``data/system_packages`` without its
+    extension, for example ``ubuntu-16.04``.
+    """
+    if name not in _system_packages:
+        path = os.path.join(DATA_ROOT, 'system_packages', '{}.json'.format(name))
+        with open(path, 'r') as file:
+            _system_packages[name] = json.load(file)
+    return _system_packages[name]
+
+
+def get_system_packages(package_map, requirements):
+    """
+    Return the build time and runtime system packages needed by the parsed
+    requirements, in the order they were first needed.
+    """
+    build_packages = []
+    runtime_packages = []
+    for name in requirements.names():
+        packages = package_map.get(name)
+        if not packages:
+            continue
+        build_packages += [package for package in packages['build'] if package not in build_packages]
+        runtime_packages += [package for package in packages['runtime'] if package not in runtime_packages]
+    return build_packages, runtime_packages
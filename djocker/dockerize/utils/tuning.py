@@ -0,0 +1,271 @@
+import os
+from collections import OrderedDict
+
+from djocker.dockerize.utils.constants import (
+    DATABASE_TUNING_PROFILES,
+    REDIS_MAXMEMORY_POLICY,
+)
+
+# Memory kept free for the operating system and the master process
+RESERVED_MEMORY_MB = 256
+
+# Rough resident memory of one Django worker process
+WORKER_MEMORY_MB = 150
+
+# Memory per CPU below which threads are not worth it
+MIN_MEMORY_PER_CPU_FOR_THREADS_MB = 512
+
+THREADS_PER_WORKER = 4
+GEVENT_WORKER_CONNECTIONS = 1000
+MAX_REQUESTS = 1000
+MAX_REQUESTS_JITTER = 100
+KEEP_ALIVE_SECONDS = 5
+
+# Requests a gevent or asyncio worker is expected to have open against the database at once
+CONCURRENT_QUERIES_PER_ASYNC_WORKER = 10
+
+# Clients the connection pooler accepts per server connection before refusing new ones
+POOL_CLIENT_CONNECTIONS_PER_SERVER = 4
+MIN_POOL_CLIENT_CONNECTIONS = 100
+
+MIN_DATABASE_MEMORY_MB = 256
+MIN_WORK_MEM_MB = 4
+MAX_MAINTENANCE_WORK_MEM_MB = 2048
+MAX_INNODB_LOG_FILE_MB = 2048
+
+# Share of the application server's memory given to the cache when no budget is set
+CACHE_MEMORY_SHARE = 0.125
+MIN_CACHE_MEMORY_MB = 64
+MAX_CACHE_THREADS = 4
+MIN_CACHE_CONNECTIONS = 1024
+# Redis only benefits from I/O threads with a few cores to spare, and supports them since 6.0
+REDIS_IO_THREADS_MIN_CPUS = 4
+REDIS_IO_THREADS_MIN_VERSION = (6,)
+
+
+def get_host_resources():
+    """Return the number of CPUs and the memory in MB of the current machine."""
+    cpus = os.cpu_count() or 1
+    try:
+        memory_mb = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        memory_mb = 1024
+    return cpus, memory_mb
+
+
+def get_worker_class(cpus, memory_mb, requirements=None):
+    if requirements is not None and 'gevent' in requirements:
+        return 'gevent'
+    if memory_mb / float(cpus) < MIN_MEMORY_PER_CPU_FOR_THREADS_MB:
+        return 'sync'
+    return 'gthread'
+
+
+def get_tuning_profile(cpus, memory_mb, requirements=None, asynchronous=False):
+    """
+    Size the application server for a machine with ``cpus`` CPUs and
+    ``memory_mb`` MB of memory.
+
+    Workers follow the usual ``2 * CPUs + 1`` rule for sync workers, one per
+    CPU plus one for threaded and gevent workers and one event loop per CPU
+    for ASGI servers, capped by the available memory.
+    """
+    cpus = max(int(cpus), 1)
+    memory_mb = max(int(memory_mb), WORKER_MEMORY_MB + RESERVED_MEMORY_MB)
+    worker_class = 'uvicorn' if asynchronous else get_worker_class(cpus, memory_mb, requirements)
+
+    if worker_class == 'sync':
+        workers = 2 * cpus + 1
+        threads = 1
+    elif worker_class == 'uvicorn':
+        workers = cpus
+        threads = 1
+    else:
+        workers = cpus + 1
+        threads = THREADS_PER_WORKER if worker_class == 'gthread' else 1
+
+    memory_bound_workers = max((memory_mb - RESERVED_MEMORY_MB) // WORKER_MEMORY_MB, 1)
+
+    return {
+        'cpus': cpus,
+        'memory_mb': memory_mb,
+        'worker_class': worker_class,
+        'workers': min(workers, memory_bound_workers),
+        'threads': threads,
+        'worker_connections': GEVENT_WORKER_CONNECTIONS,
+        'max_requests': MAX_REQUESTS,
+        'max_requests_jitter': MAX_REQUESTS_JITTER,
+        'keep_alive': KEEP_ALIVE_SECONDS,
+    }
+
+
+def get_application_command(application_server, dot_path, profile):
+    """
+    Return the command line that starts the application server, ``dot_path``
+    being the dotted path of the WSGI or ASGI module it serves.
+    """
+    application = '{}:application'.format(dot_path)
+
+    if application_server == 'uvicorn':
+        return ['uvicorn', application,
+                '--host', '0.0.0.0',
+                '--port', '80',
+                '--workers', str(profile['workers']),
+                '--loop', 'uvloop',
+                '--http', 'httptools',
+                '--timeout-keep-alive', str(profile['keep_alive']),
+                '--no-access-log']
+
+    if application_server == 'gunicorn-uvicorn':
+        return ['gunicorn', application,
+                '--bind', '0.0.0.0:80',
+                '--workers', str(profile['workers']),
+                '--worker-class', 'uvicorn.workers.UvicornWorker',
+                '--max-requests', str(profile['max_requests']),
+                '--max-requests-jitter', str(profile['max_requests_jitter']),
+                '--keep-alive', str(profile['keep_alive'])]
+
+    if application_server == 'gunicorn':
+        command = ['gunicorn', application,
+                   '--bind', '0.0.0.0:80',
+                   '--workers', str(profile['workers']),
+                   '--worker-class', profile['worker_class']]
+        if profile['worker_class'] == 'gthread':
+            command += ['--threads', str(profile['threads'])]
+        elif profile['worker_class'] == 'gevent':
+            command += ['--worker-connections', str(profile['worker_connections'])]
+        return command + ['--max-requests', str(profile['max_requests']),
+                          '--max-requests-jitter', str(profile['max_requests_jitter']),
+                          '--keep-alive', str(profile['keep_alive'])]
+
+    if application_server == 'uwsgi':
+        command = ['uwsgi',
+                   '--http', ':80',
+                   '--module', application,
+                   '--master',
+                   '--processes', str(profile['workers'])]
+        if profile['threads'] > 1:
+            command += ['--threads', str(profile['threads'])]
+        return command + ['--max-requests', str(profile['max_requests']),
+                          '--http-keepalive',
+                          '--die-on-term']
+
+    return None
+
+
+def get_connection_pool_sizes(profile, replicas=1):
+    """
+    Size the connection pooler for ``replicas`` api containers running the
+    profile. Django holds at most one connection per thread, so the pool needs
+    one server connection per request that can run at the same time.
+    """
+    if profile['worker_class'] in ('gevent', 'uvicorn'):
+        concurrency = profile['workers'] * CONCURRENT_QUERIES_PER_ASYNC_WORKER
+    else:
+        concurrency = profile['workers'] * profile['threads']
+    pool_size = concurrency * max(int(replicas), 1)
+
+    return {
+        'pool_size': pool_size,
+        'max_client_connections': max(pool_size * POOL_CLIENT_CONNECTIONS_PER_SERVER, MIN_POOL_CLIENT_CONNECTIONS),
+    }
+
+
+def get_postgres_settings(memory_mb, profile):
+    shared_buffers = int(memory_mb * profile['shared_buffers'])
+    work_mem = (memory_mb - shared_buffers) // (profile['max_connections'] * profile['work_mem_per_connection'])
+    return OrderedDict([
+        ('max_connections', profile['max_connections']),
+        ('shared_buffers', '{}MB'.format(shared_buffers)),
+        ('effective_cache_size', '{}MB'.format(int(memory_mb * profile['effective_cache_size']))),
+        ('work_mem', '{}MB'.format(max(work_mem, MIN_WORK_MEM_MB))),
+        ('maintenance_work_mem', '{}MB'.format(min(memory_mb // 16, MAX_MAINTENANCE_WORK_MEM_MB))),
+        ('wal_buffers', '16MB'),
+        ('min_wal_size', profile['min_wal_size']),
+        ('max_wal_size', profile['max_wal_size']),
+        ('checkpoint_completion_target', '0.9'),
+        ('synchronous_commit', profile['synchronous_commit']),
+        ('random_page_cost', '1.1'),
+    ])
+
+
+def get_mysql_settings(memory_mb, profile):
+    buffer_pool = int(memory_mb * profile['buffer_pool'])
+    return OrderedDict([
+        ('max-connections', profile['max_connections']),
+        ('innodb-buffer-pool-size', '{}M'.format(buffer_pool)),
+        ('innodb-buffer-pool-instances', min(max(buffer_pool // 1024, 1), 8)),
+        ('innodb-log-file-size', '{}M'.format(min(max(buffer_pool // 4, 48), MAX_INNODB_LOG_FILE_MB))),
+        ('innodb-flush-log-at-trx-commit', profile['flush_log_at_trx_commit']),
+        ('innodb-flush-method', 'O_DIRECT'),
+        ('tmp-table-size', '64M'),
+        ('max-heap-table-size', '64M'),
+    ])
+
+
+def get_database_settings(database_type, memory_mb, workload):
+    """
+    Return the server settings tuning ``database_type`` for ``workload`` on
+    a machine with ``memory_mb`` MB of memory, or ``None`` when there is no
+    profile for them.
+    """
+    profile = DATABASE_TUNING_PROFILES.get(database_type, {}).get(workload)
+    if profile is None:
+        return None
+
+    memory_mb = max(int(memory_mb), MIN_DATABASE_MEMORY_MB)
+    if database_type == 'postgres':
+        return get_postgres_settings(memory_mb, profile)
+    return get_mysql_settings(memory_mb, profile)
+
+
+def get_database_command(database_type, settings):
+    """Return the command starting the database image's server with ``settings``."""
+    if database_type == 'postgres':
+        command = ['postgres']
+        for key, value in settings.items():
+            command += ['-c', '{}={}'.format(key, value)]
+        return command
+    return ['mysqld'] + ['--{}={}'.format(key, value) for key, value in settings.items()]
+
+
+def get_cache_memory(memory_mb):
+    """Return the default cache memory budget for an application server with ``memory_mb`` MB."""
+    return max(int(memory_mb * CACHE_MEMORY_SHARE), MIN_CACHE_MEMORY_MB)
+
+
+def get_cache_command(cache_type, version, memory_mb, profile):
+    """
+    Return the command starting a ``cache_type`` server of ``version`` (a
+    tuple of integers, or ``None`` if unknown) that keeps to ``memory_mb`` MB
+    and serves the application servers of ``profile``.
+    """
+    cpus = profile['cpus']
+
+    if cache_type == 'redis':
+        # A cache has nothing worth persisting, so snapshots and the append only file are off
+        command = ['redis-server',
+                   '--maxmemory', '{}mb'.format(memory_mb),
+                   '--maxmemory-policy', REDIS_MAXMEMORY_POLICY,
+                   '--save', '',
+                   '--appendonly', 'no']
+        if version and version >= REDIS_IO_THREADS_MIN_VERSION and cpus >= REDIS_IO_THREADS_MIN_CPUS:
+            command += ['--io-threads', str(min(cpus - 1, MAX_CACHE_THREADS))]
+        return command
+
+    if cache_type == 'memcached':
+        connections = profile['workers'] * profile['threads'] * POOL_CLIENT_CONNECTIONS_PER_SERVER
+        return ['memcached',
+                '-m', str(memory_mb),
+                '-t', str(min(cpus, MAX_CACHE_THREADS)),
+                '-c', str(max(connections, MIN_CACHE_CONNECTIONS))]
+
+    return None
+
+
+def get_deploy_resources(profile):
+    """Return the compose ``deploy.resources.limits`` matching the profile."""
+    return {
+        'cpus': str(profile['cpus']),
+        'memory': '{}M'.format(profile['memory_mb']),
+    }
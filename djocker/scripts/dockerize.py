@@ -1,41 +1,104 @@
 import os
-import re
 import sys
 from collections import OrderedDict
-from pathlib import Path
 
+from djocker.config import config as djocker_config
 from djocker.dockerize.config import DockerizeConfig
-from djocker.dockerize.handlers.compose import ComposeHandler
+from djocker.dockerize.handlers.base import run_handlers
+from djocker.dockerize.handlers.compose import (
+    ComposeHandler,
+    ProductionComposeHandler,
+)
+from djocker.dockerize.handlers.dockerignore import DockerIgnoreHandler
 from djocker.dockerize.handlers.entrypoint import EntrypointHandler
+from djocker.dockerize.handlers.nginx import NginxHandler
+from djocker.dockerize.handlers.pooler import ProxySQLHandler
+from djocker.dockerize.handlers.python import (
+    PythonAlpineHandler,
+    PythonSlimHandler,
+)
 from djocker.dockerize.handlers.ubuntu import UbuntuHandler
+from djocker.dockerize.state import STATE_FILE, GenerationState
+from djocker.dockerize.utils.constants import (
+    CODE_ROOT,
+    CONNECTION_POOLER_IMAGE,
+    DATABASE_TUNING_PROFILES,
+)
+from djocker.dockerize.utils.tuning import get_cache_memory, get_host_resources
 from djocker.utils import cli
 from djocker.utils.ask import ValidationError, ask
+from djocker.utils.catalog import CatalogError, ImageCatalog
 from djocker.utils.colors import Colors, color
-from djocker.utils.docker_index import DockerIndex
-from djocker.utils.file import find_filename
+from djocker.utils.docker_index import DockerIndex, OfflineDockerIndex
+from djocker.utils.file import get_relative_dotted_path
+from djocker.utils.project import ProjectIndex
 
 
 class FakeDjangoSettings:
     pass
 
 
+DEFAULT_BASE_IMAGE = 'ubuntu:16.04'
+
+PROJECT_SCAN_WORKERS = 4
+
 OS_IMAGE_HANDLERS = {
     'ubuntu': UbuntuHandler,
+    'python-slim': PythonSlimHandler,
+    'python-alpine': PythonAlpineHandler,
 }
 
+# Variants of the python image, told apart by their tag
+PYTHON_IMAGE_VARIANTS = ['slim', 'alpine']
+
 verbose_name_db_mapping = OrderedDict([
     ('postgres', 'PostgreSQL'),
     ('mariadb', 'MariaDB'),
     ('mysql', 'MySQL'),
 ])
 
+verbose_name_workload_mapping = OrderedDict([
+    ('oltp', 'OLTP'),
+    ('read-heavy', 'Read heavy'),
+    ('dev', 'Development/testing'),
+    (None, 'Stock configuration'),
+])
+
 verbose_name_cache_mapping = OrderedDict([
     ('redis', 'Redis'),
     ('memcached', 'Memcached'),
 ])
 
 
-def get_database_type(django_settings):
+def get_operating_system(docker_image):
+    """
+    Return the key of the handler for ``docker_image``: the repository name,
+    followed by the variant for the python image, e.g. ``python-alpine``.
+    """
+    repo_name, _, tag = docker_image.partition(':')
+    if repo_name != 'python':
+        return repo_name
+    for variant in PYTHON_IMAGE_VARIANTS:
+        # Tags look like 3.8-slim, 3.8-slim-buster or 3.8-alpine3.12
+        if any(part.startswith(variant) for part in tag.split('-')):
+            return '{}-{}'.format(repo_name, variant)
+    return repo_name
+
+
+def get_handlers(config, entrypoint=True):
+    """Return the handlers generating every file ``config`` asks for."""
+    handlers = [OS_IMAGE_HANDLERS[config.operating_system](config)]
+    if entrypoint:
+        handlers.append(EntrypointHandler(config))
+    if config.connection_pooler and config.database_type == 'mysql':
+        handlers.append(ProxySQLHandler(config))
+    handlers += [ComposeHandler(config), DockerIgnoreHandler(config)]
+    if config.production:
+        handlers += [ProductionComposeHandler(config), NginxHandler(config)]
+    return handlers
+
+
+def get_database_type(django_settings, verbose=True):
     database_mapping = {
         'postgresql_psycopg2': 'postgres',
         'mysql': 'mysql',
@@ -46,24 +109,28 @@ def get_database_type(django_settings):
         return None
 
     num_databases = len(django_databases)
-    print("\nChecking for databases in settings... ", end="", flush=True)
+    if verbose:
+        print("\nChecking for databases in settings... ", end="", flush=True)
 
     if num_databases > 1:
-        print(color("mutiple database setups", Colors.WARNING))
+        if verbose:
+            print(color("mutiple database setups", Colors.WARNING))
         return None
 
     default_database = django_databases['default']['ENGINE']
     database_engine = default_database.split('.')[-1]
     database_type = database_mapping.get(database_engine)
     if not database_type:
-        print(color("no auto setup support for {}".format(database_engine), Colors.WARNING))
+        if verbose:
+            print(color("no auto setup support for {}".format(database_engine), Colors.WARNING))
         return None
 
-    print(color("found {}".format(database_type), Colors.OKGREEN))
+    if verbose:
+        print(color("found {}".format(database_type), Colors.OKGREEN))
     return database_type
 
 
-def get_cache_type(django_settings):
+def get_cache_type(django_settings, verbose=True):
     supported_caches = ['memcached', 'redis']
     caches_setting = getattr(django_settings, 'CACHES', {})
 
@@ -71,11 +138,13 @@ def get_cache_type(django_settings):
         return None
 
     num_caches = len(caches_setting)
-    print("\nChecking for caches in settings... ", end="", flush=True)
+    if verbose:
+        print("\nChecking for caches in settings... ", end="", flush=True)
 
     cache_type = None
     if num_caches > 1:
-        print(color("mutiple cache setups found", Colors.WARNING))
+        if verbose:
+            print(color("mutiple cache setups found", Colors.WARNING))
         return None
 
     default_cache = caches_setting['default']['BACKEND']
@@ -84,30 +153,61 @@ def get_cache_type(django_settings):
             cache_type = supported_cache
 
     if not cache_type:
-        print(color("no auto setup support for {}".format(default_cache), Colors.WARNING))
+        if verbose:
+            print(color("no auto setup support for {}".format(default_cache), Colors.WARNING))
         return None
 
     return cache_type
 
 
+def get_static_settings(django_settings, base_dir):
+    """
+    Return ``STATIC_URL`` and the path ``STATIC_ROOT`` has inside the
+    application container.
+    """
+    static_url = getattr(django_settings, 'STATIC_URL', None) or '/static/'
+    static_root = getattr(django_settings, 'STATIC_ROOT', None)
+    if not static_root:
+        return static_url, '{}/static'.format(CODE_ROOT)
+
+    relative_root = os.path.relpath(os.path.abspath(static_root), os.path.abspath(base_dir))
+    if relative_root.startswith(os.pardir):
+        return static_url, static_root
+    return static_url, '{}/{}'.format(CODE_ROOT, relative_root)
+
+
 class DockerImageValidator:
-    def validate(self, value):
-        client = DockerIndex()
+    def __init__(self, client=None):
+        self.client = client or DockerIndex()
 
+    def validate(self, value):
         image_info = value.split(':')
         if len(image_info) != 2:
             raise ValidationError('The image must include both a repo and a tag')
         repo, tag = image_info
 
-        tags = client.repo_tags(repo)
+        tags = self.client.repo_tags(repo)
         if not tags:
             raise ValidationError('No such repo')
         if tag not in tags:
             raise ValidationError('No such tag for "{}"'.format(repo))
 
 
+class DottedPathValidator:
+    def validate(self, value):
+        if not all(part.isidentifier() for part in value.split('.')):
+            raise ValidationError('Please enter a dotted module path, e.g. project.wsgi')
+
+
+class PositiveIntegerValidator:
+    def validate(self, value):
+        if not value.isdigit() or int(value) < 1:
+            raise ValidationError('Please enter a positive whole number')
+
+
 class DockerImageVersionValidator(DockerImageValidator):
-    def __init__(self, repo_name):
+    def __init__(self, repo_name, client=None):
+        super().__init__(client)
         self.repo_name = repo_name
 
     def validate(self, value):
@@ -123,7 +223,11 @@ class Dockerize(cli.Command):
         self.django_available = False
         self.django_settings_path = None
         self.django_settings = FakeDjangoSettings()
+        self.project_index = None
         self.setup_django()
+        self.docker_index = self.get_docker_index()
+        if not getattr(self.args, 'regenerate', False):
+            self.prefetch_images()
 
     def print_logo(self):
         print("""
@@ -137,8 +241,25 @@ class Dockerize(cli.Command):
     def setup_paths(self):
         sys.path.append(os.getcwd())
 
+    def _get_django_settings_path(self):
+        project_index = self._get_project_index(os.getcwd())
+        settings_modules = project_index.settings_modules()
+        if not settings_modules:
+            return None
+        default = project_index.default_settings_module()
+
+        no_settings = 'Do not use Django settings'
+        response = ask(
+            question='Which Django settings should be used? (--djangosettings)',
+            choices=settings_modules + [no_settings],
+            default=default if default in settings_modules else settings_modules[0],
+        )
+        return None if response == no_settings else response
+
     def setup_django(self):
         django_settings_path = getattr(self.args, 'djangosettings', None)
+        if not django_settings_path and not getattr(self.args, 'regenerate', False):
+            django_settings_path = self._get_django_settings_path()
         if django_settings_path:
             os.environ.setdefault("DJANGO_SETTINGS_MODULE", django_settings_path)
             try:
@@ -155,8 +276,45 @@ class Dockerize(cli.Command):
                 self.django_settings_path = None
                 pass
 
+    def get_docker_index(self):
+        catalog_path = getattr(self.args, 'catalog', None)
+        if not catalog_path and not getattr(self.args, 'offline', False):
+            return DockerIndex(refresh=getattr(self.args, 'refresh_index', False))
+
+        catalog_path = catalog_path or djocker_config.image_catalog
+        try:
+            catalog = ImageCatalog(catalog_path)
+        except CatalogError as e:
+            print(color(str(e), Colors.FAIL))
+            sys.exit(1)
+
+        print("Using image catalog: ", end="", flush=True)
+        print(color("{}\n".format(catalog_path), Colors.OKGREEN))
+        return OfflineDockerIndex(catalog)
+
+    def prefetch_images(self):
+        # Start the index lookups for the images we are likely to ask about
+        # while the user is still answering the earlier questions
+        repo_names = [DEFAULT_BASE_IMAGE.split(':')[0]]
+        try:
+            repo_names.append(get_database_type(self.django_settings, verbose=False))
+            repo_names.append(get_cache_type(self.django_settings, verbose=False))
+        except Exception:
+            # Broken settings are reported when the questions are asked
+            pass
+        self.docker_index.prefetch(*repo_names)
+
     def add_arguments(self, parser):
         parser.add_argument('--djangosettings', nargs="?", default=None)
+        parser.add_argument('--refresh-index', action='store_true',
+                            help='Ignore cached Docker index lookups and fetch them again')
+        parser.add_argument('--offline', action='store_true',
+                            help='Look up images from the local image catalog instead of the Docker index')
+        parser.add_argument('--catalog', default=None,
+                            help='Path of the image catalog to use, implies --offline')
+        parser.add_argument('--regenerate', action='store_true',
+                            help='Render the files again from the answers saved in {} without asking'.format(
+                                STATE_FILE))
 
     def _get_basedir(self):
         current_work_dir = os.getcwd()
@@ -180,15 +338,20 @@ class Dockerize(cli.Command):
         )
         return base_dir
 
+    def _get_project_index(self, base_dir):
+        if self.project_index is None or self.project_index.base_dir != base_dir:
+            self.project_index = ProjectIndex(base_dir, workers=PROJECT_SCAN_WORKERS)
+        return self.project_index
+
     def _get_base_image(self):
         docker_image = ask(
             question='What docker image be based on?',
-            default='ubuntu:16.04',
-            validator=DockerImageValidator(),
+            default=DEFAULT_BASE_IMAGE,
+            validator=DockerImageValidator(self.docker_index),
             newline=False
         )
         print('Using docker image: {}'.format(color(docker_image, Colors.HEADER)))
-        operating_system = docker_image.split(':')[0]
+        operating_system = get_operating_system(docker_image)
 
         return docker_image, operating_system
 
@@ -249,8 +412,7 @@ class Dockerize(cli.Command):
         return cache_docker_image, cache_type
 
     def _get_docker_image_version(self, docker_image, verbose_name):
-        client = DockerIndex()
-        available_versions = client.get_latest_version_tags(docker_image)
+        available_versions = self.docker_index.get_latest_version_tags(docker_image)
         cache_version = ask(
             question='Which {} version do you want to use?'.format(verbose_name),
             choices=list(available_versions.keys()) + ['custom']
@@ -259,7 +421,7 @@ class Dockerize(cli.Command):
         if cache_version == 'custom':
             cache_version = ask(
                 question='Specify {} version'.format(verbose_name),
-                validator=DockerImageVersionValidator(docker_image),
+                validator=DockerImageVersionValidator(docker_image, self.docker_index),
             )
 
         cache_image_flavor = False
@@ -285,9 +447,7 @@ class Dockerize(cli.Command):
             print(color("skipping due to no base dir", Colors.WARNING))
             return None
 
-        requirements_re = re.compile('requirements.*\.txt')
-        root_files = os.listdir(base_dir)
-        requirements_files = [root_file for root_file in root_files if requirements_re.match(root_file)]
+        requirements_files = self._get_project_index(base_dir).requirements_files()
         requirements_files_string = ', '.join(requirements_files)
         print("{}".format(color(requirements_files_string, Colors.HEADER)))
         return requirements_files
@@ -318,49 +478,157 @@ class Dockerize(cli.Command):
             choices=supported_python_versions,
         )
 
-    def _get_application_server(self):
-        application_server_mapping = {
-            'uwsgi': 'uWSGI',
-            'gunicorn': 'Gunicorn'
-        }
+    def _get_application_server(self, asgi_available=False):
+        application_server_mapping = OrderedDict([
+            ('uwsgi', 'uWSGI'),
+            ('gunicorn', 'Gunicorn'),
+        ])
+        default = 'uWSGI'
+
+        if asgi_available:
+            application_server_mapping['uvicorn'] = 'Uvicorn (ASGI)'
+            application_server_mapping['gunicorn-uvicorn'] = 'Gunicorn with Uvicorn workers (ASGI)'
+            default = 'Gunicorn with Uvicorn workers (ASGI)'
 
         return ask(
             question='Which application server is used in production?',
-            default='uWSGI',
+            default=default,
             choices=application_server_mapping,
         )
 
-    def _get_wsgi_file(self, base_dir):
+    def _get_target_resources(self):
+        host_cpus, host_memory = get_host_resources()
+        default_cpus = str(djocker_config.target_cpus or host_cpus)
+        default_memory = str(djocker_config.target_memory or host_memory)
+
+        target_cpus = ask(
+            question='How many CPUs does the production application server have?',
+            default=default_cpus,
+            validator=PositiveIntegerValidator(),
+        )
+        target_memory = ask(
+            question='How much memory (in MB) does the production application server have?',
+            default=default_memory,
+            validator=PositiveIntegerValidator(),
+        )
+        return int(target_cpus), int(target_memory)
+
+    def _get_multi_stage(self):
+        multi_stage_response = ask(
+            question='Do you want to build python dependencies in a separate builder stage?',
+            default='No',
+            choices=['Yes', 'No']
+        )
+        return multi_stage_response == 'Yes'
+
+    def _get_collectstatic_at_build(self):
+        collectstatic_response = ask(
+            question='Do you want to collect static files when building the image instead of on container start?',
+            default='No',
+            choices=['Yes', 'No']
+        )
+        return collectstatic_response == 'Yes'
+
+    def _get_connection_pooler(self, database_type):
+        if database_type not in CONNECTION_POOLER_IMAGE:
+            return False
+        pooler_response = ask(
+            question='Do you want to put a connection pooler ({}) in front of the database?'.format(
+                'ProxySQL' if database_type == 'mysql' else 'PgBouncer'),
+            default='No',
+            choices=['Yes', 'No']
+        )
+        return pooler_response == 'Yes'
+
+    def _get_database_tuning(self, database_type, default_memory):
+        if database_type not in DATABASE_TUNING_PROFILES:
+            return None, None
+        workload = ask(
+            question='Which workload should the database be tuned for?',
+            default='Development/testing',
+            choices=verbose_name_workload_mapping,
+        )
+        if workload is None:
+            return None, None
+        memory = ask(
+            question='How much memory (in MB) does the database server have?',
+            default=str(default_memory),
+            validator=PositiveIntegerValidator(),
+        )
+        return workload, int(memory)
+
+    def _get_cache_memory(self, target_memory):
+        default_memory = djocker_config.cache_memory or get_cache_memory(target_memory)
+        cache_memory = ask(
+            question='How much memory (in MB) can the cache use?',
+            default=str(default_memory),
+            validator=PositiveIntegerValidator(),
+        )
+        return int(cache_memory)
+
+    def _get_production(self):
+        production_response = ask(
+            question='Do you want a production compose file with the api replicas behind nginx?',
+            default='No',
+            choices=['Yes', 'No']
+        )
+        if production_response != 'Yes':
+            return False, 1, False
+        replicas = ask(
+            question='How many api replicas should nginx balance between?',
+            default='2',
+            validator=PositiveIntegerValidator(),
+        )
+        microcache_response = ask(
+            question='Do you want nginx to cache anonymous GET requests for a second?',
+            default='No',
+            choices=['Yes', 'No']
+        )
+        return True, int(replicas), microcache_response == 'Yes'
+
+    def _get_application_file(self, base_dir, filename, verbose_name):
         search_dir = base_dir
 
-        # Try to guess in which folder the WSGI file is in if Django is enabled
+        # Try to guess in which folder the application file is in if Django is enabled
         if self.django_settings and self.django_settings_path:
             search_dir += '/{}'.format(self.django_settings_path.split('.')[0])
 
-        # Find all wsgi files
-        wsgi_settings = find_filename('wsgi.py', search_dir)
+        # Find all application files
+        application_files = self._get_project_index(base_dir).find(filename, within=search_dir)
 
-        if not wsgi_settings:
-            return wsgi_settings
+        if not application_files:
+            return None
 
-        if len(wsgi_settings) > 1:
+        if len(application_files) > 1:
             # Handle multiple files
             return ask(
-                question='More then one WSGI settings file detected, which should be used?',
-                choices=wsgi_settings,
+                question='More then one {} settings file detected, which should be used?'.format(verbose_name),
+                choices=application_files,
             )
         else:
             # Do not ask if we only found one file
-            return wsgi_settings[0]
+            return application_files[0]
 
-    def _get_relative_dotted_path(self, path, relative_to_path):
-        # Get path relative to the root of the project
-        relative_path = Path(path).relative_to(relative_to_path)
+    def _get_wsgi_file(self, base_dir):
+        return self._get_application_file(base_dir, 'wsgi.py', 'WSGI')
+
+    def _get_asgi_file(self, base_dir):
+        return self._get_application_file(base_dir, 'asgi.py', 'ASGI')
+
+    def _get_application_dot_path(self, verbose_name):
+        print(color('\nCould not find the {} module of the project.'.format(verbose_name), Colors.WARNING))
+        return ask(
+            question='What is the dotted path of the {} module?'.format(verbose_name),
+            validator=DottedPathValidator(),
+        )
 
-        # Create module path
-        return str(relative_path).replace('/', '.').replace('.py', '')
+    def _get_relative_dotted_path(self, path, relative_to_path):
+        return get_relative_dotted_path(path, relative_to_path)
 
     def handle(self, *args, **options):
+        if getattr(self.args, 'regenerate', False):
+            return self.regenerate()
+
         config = DockerizeConfig()
         config.base_dir = self._get_basedir()
 
@@ -377,22 +645,69 @@ class Dockerize(cli.Command):
 
         config.database_image, config.database_type = self._get_database_image()
 
+        config.connection_pooler = self._get_connection_pooler(config.database_type)
+
         config.cache_image, config.cache_type = self._get_cache_image()
 
         config.requirement_files = self._get_requirements_files(config.base_dir)
 
         config.wsgi_path = self._get_wsgi_file(config.base_dir)
-        config.wsgi_dot_path = self._get_relative_dotted_path(config.wsgi_path, config.base_dir)
-        config.application_server = self._get_application_server()
-
+        if config.wsgi_path:
+            config.wsgi_dot_path = self._get_relative_dotted_path(config.wsgi_path, config.base_dir)
+        config.asgi_path = self._get_asgi_file(config.base_dir)
+        if config.asgi_path:
+            config.asgi_dot_path = self._get_relative_dotted_path(config.asgi_path, config.base_dir)
+        config.application_server = self._get_application_server(asgi_available=bool(config.asgi_path))
+        # The application server cannot start without the module to serve
+        if os_image_handler.is_asgi() and not config.asgi_dot_path:
+            config.asgi_dot_path = self._get_application_dot_path('ASGI')
+        elif not os_image_handler.is_asgi() and not config.wsgi_dot_path:
+            config.wsgi_dot_path = self._get_application_dot_path('WSGI')
+        config.target_cpus, config.target_memory = self._get_target_resources()
+        config.database_workload, config.database_memory = self._get_database_tuning(config.database_type,
+                                                                                     config.target_memory)
+        if config.cache_image:
+            config.cache_memory = self._get_cache_memory(config.target_memory)
+        config.multi_stage = self._get_multi_stage()
+        config.collectstatic_at_build = self._get_collectstatic_at_build()
+        config.production, config.api_replicas, config.microcache = self._get_production()
+        if config.production:
+            config.static_url, config.static_root = get_static_settings(self.django_settings, config.base_dir)
+
+        self.write_files(config, entrypoint=self.django_available)
+
+    def write_files(self, config, entrypoint, state=None):
         print(color("\nSetting up docker environment", Colors.OKGREEN))
         print(color("--------------------------------\n", Colors.OKGREEN))
 
-        os_image_handler.config = config
-        os_image_handler.handle()
-        if self.django_available:
-            EntrypointHandler(config).handle()
-        ComposeHandler(config).handle()
+        state = state or GenerationState.load(config.base_dir)
+        state.answers = config.to_dict()
+        run_handlers(get_handlers(config, entrypoint), state)
+        state.save()
+
+        if state.modified:
+            print(color("\nThe files below have been edited by hand and were left as they are. "
+                        "Remove them to generate them again:", Colors.WARNING))
+            for out_file in state.modified:
+                print(color("  {}".format(out_file), Colors.WARNING))
+        return state
+
+    def regenerate(self):
+        base_dir = self._get_basedir()
+        state = GenerationState.load(base_dir)
+        if not state.answers:
+            print(color("No saved answers found in {}, run 'dockerize' first".format(state.path), Colors.FAIL))
+            sys.exit(1)
+
+        config = DockerizeConfig.from_dict(state.answers, base_dir)
+        if config.operating_system not in OS_IMAGE_HANDLERS:
+            print(color("Sorry, 'dockerize' does not currently support '{}' as a base OS".format(
+                config.operating_system), Colors.FAIL))
+            sys.exit(1)
+
+        state = self.write_files(config, EntrypointHandler.out_file in state.files, state)
+        if state.modified:
+            sys.exit(1)
 
 
 def main():
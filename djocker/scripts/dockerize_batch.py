@@ -0,0 +1,221 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import requests
+
+from djocker.dockerize.config import DockerizeConfig
+from djocker.dockerize.handlers.base import run_handlers
+from djocker.dockerize.state import GenerationState
+from djocker.dockerize.utils.constants import (
+    ASGI_APPLICATION_SERVERS,
+    CODE_ROOT,
+    DATABASE_WORKLOADS,
+)
+from djocker.scripts.dockerize import (
+    DEFAULT_BASE_IMAGE,
+    OS_IMAGE_HANDLERS,
+    DockerImageValidator,
+    get_handlers,
+    get_operating_system,
+)
+from djocker.utils import cli
+from djocker.utils.colors import Colors, color
+from djocker.utils.docker_index import DockerIndex
+from djocker.utils.file import get_relative_dotted_path
+from djocker.utils.project import ProjectIndex
+
+
+class BatchError(Exception):
+    pass
+
+
+def load_manifest(manifest_path):
+    """
+    Read a batch manifest and return the answers of each project.
+
+    The manifest is a JSON file of the form::
+
+        {
+            "defaults": {"python_version": "3.5", "application_server": "gunicorn"},
+            "projects": [
+                {"path": "services/api", "database_image": "postgres:10.4", "database_type": "postgres"}
+            ]
+        }
+
+    Project paths are relative to the manifest and project answers override
+    the defaults.
+    """
+    with open(manifest_path, 'r') as file:
+        manifest = json.load(file)
+
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    defaults = manifest.get('defaults', {})
+
+    projects = []
+    for project in manifest.get('projects', []):
+        answers = dict(defaults)
+        answers.update(project)
+        answers['path'] = os.path.normpath(os.path.join(manifest_dir, answers['path']))
+        projects.append(answers)
+    return projects
+
+
+def get_project_images(answers):
+    return [image for image in (
+        answers.get('base_image', DEFAULT_BASE_IMAGE),
+        answers.get('database_image'),
+        answers.get('cache_image'),
+    ) if image]
+
+
+def get_application_path(answers, base_dir, project_index, filename, required=True):
+    answer_key = '{}_path'.format(filename.split('.')[0])
+    if answers.get(answer_key):
+        return os.path.join(base_dir, answers[answer_key])
+
+    search_dir = base_dir
+    if answers.get('django_settings'):
+        search_dir = os.path.join(base_dir, answers['django_settings'].split('.')[0])
+
+    application_files = project_index.find(filename, within=search_dir)
+    if not application_files and not required:
+        return None
+    if len(application_files) != 1:
+        raise BatchError('Found {} {} files, set "{}" in the manifest'.format(
+            len(application_files), filename, answer_key))
+    return application_files[0]
+
+
+def build_config(answers):
+    base_dir = answers['path']
+    if not os.path.isdir(base_dir):
+        raise BatchError('No such directory: {}'.format(base_dir))
+
+    project_index = ProjectIndex(base_dir)
+
+    config = DockerizeConfig()
+    config.base_dir = base_dir
+    config.base_image = answers.get('base_image', DEFAULT_BASE_IMAGE)
+    config.operating_system = get_operating_system(config.base_image)
+    config.python_version = answers.get('python_version')
+    config.database_image = answers.get('database_image')
+    config.database_type = answers.get('database_type')
+    config.connection_pooler = answers.get('connection_pooler', False)
+    config.database_workload = answers.get('database_workload')
+    if config.database_workload and config.database_workload not in DATABASE_WORKLOADS:
+        raise BatchError('Unknown database_workload "{}", use one of: {}'.format(
+            config.database_workload, ', '.join(DATABASE_WORKLOADS)))
+    config.database_memory = answers.get('database_memory')
+    config.cache_image = answers.get('cache_image')
+    config.cache_type = answers.get('cache_type')
+    config.cache_memory = answers.get('cache_memory')
+    config.requirement_files = answers.get('requirement_files') or project_index.requirements_files()
+    config.application_server = answers.get('application_server', 'uwsgi')
+    asgi_required = config.application_server in ASGI_APPLICATION_SERVERS
+    config.wsgi_path = get_application_path(answers, base_dir, project_index, 'wsgi.py', not asgi_required)
+    if config.wsgi_path:
+        config.wsgi_dot_path = get_relative_dotted_path(config.wsgi_path, base_dir)
+    config.asgi_path = get_application_path(answers, base_dir, project_index, 'asgi.py', asgi_required)
+    if config.asgi_path:
+        config.asgi_dot_path = get_relative_dotted_path(config.asgi_path, base_dir)
+    config.multi_stage = answers.get('multi_stage', False)
+    config.collectstatic_at_build = answers.get('collectstatic_at_build', False)
+    config.production = answers.get('production', False)
+    config.api_replicas = answers.get('api_replicas', 2 if config.production else 1)
+    config.microcache = answers.get('microcache', False)
+    config.static_url = answers.get('static_url', '/static/')
+    config.static_root = answers.get('static_root', '{}/static'.format(CODE_ROOT))
+    config.target_cpus = answers.get('target_cpus')
+    config.target_memory = answers.get('target_memory')
+    return config
+
+
+def dockerize_project(answers):
+    """
+    Run the dockerize pipeline for one project without asking anything.
+
+    Returns a ``(path, error, duration)`` tuple, where ``error`` is ``None``
+    on success. Runs in a worker process.
+    """
+    start = time.time()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            config = build_config(answers)
+
+            if config.operating_system not in OS_IMAGE_HANDLERS:
+                raise BatchError("'{}' is not supported as a base OS".format(config.operating_system))
+
+            validator = DockerImageValidator(DockerIndex())
+            for image in get_project_images(answers):
+                validator.validate(image)
+
+            os_image_handler = OS_IMAGE_HANDLERS[config.operating_system](config)
+            if config.python_version not in os_image_handler.supported_python_versions:
+                raise BatchError('Python {} is not supported by {}'.format(config.python_version, config.base_image))
+
+            state = GenerationState.load(config.base_dir)
+            state.answers = config.to_dict()
+            run_handlers(get_handlers(config, answers.get('entrypoint', True)), state)
+            state.save()
+            if state.modified:
+                raise BatchError('Edited by hand, not overwritten: {}'.format(', '.join(state.modified)))
+    except Exception as e:
+        return answers['path'], '{}: {}'.format(e.__class__.__name__, e), time.time() - start
+
+    return answers['path'], None, time.time() - start
+
+
+class DockerizeBatch(cli.Command):
+    description = 'Run dockerize for every project listed in a manifest without prompting'
+
+    def add_arguments(self, parser):
+        parser.add_argument('manifest')
+        parser.add_argument('--jobs', type=int, default=None,
+                            help='Number of worker processes, defaults to the number of CPUs')
+
+    def warm_index(self, projects):
+        # Look every repository up once so that the workers share the on-disk cache
+        repo_names = {image.split(':')[0] for answers in projects for image in get_project_images(answers)}
+        client = DockerIndex()
+        client.prefetch(*repo_names)
+        for repo_name in repo_names:
+            try:
+                client.repo_tags(repo_name)
+            except (requests.RequestException, ValueError) as e:
+                # The projects using the repository look it up again and report their own failure
+                print(color('Could not look up {} in the Docker index: {}'.format(repo_name, e), Colors.WARNING))
+
+    def handle(self, *args, **options):
+        projects = load_manifest(self.args.manifest)
+        if not projects:
+            print(color('No projects found in {}'.format(self.args.manifest), Colors.WARNING))
+            return
+
+        self.warm_index(projects)
+
+        failures = 0
+        with ProcessPoolExecutor(max_workers=self.args.jobs) as executor:
+            for path, error, duration in executor.map(dockerize_project, projects):
+                if error:
+                    failures += 1
+                    print('{} {} ({:.2f}s)'.format(color('FAIL', Colors.FAIL), path, duration))
+                    print('     {}'.format(error))
+                else:
+                    print('{}   {} ({:.2f}s)'.format(color('OK', Colors.OKGREEN), path, duration))
+
+        print('\n{} projects, {} succeeded, {} failed'.format(len(projects), len(projects) - failures, failures))
+        if failures:
+            sys.exit(1)
+
+
+def main():
+    cli.run_command(DockerizeBatch)
+
+
+if __name__ == "__main__":
+    main()
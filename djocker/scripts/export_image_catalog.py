@@ -0,0 +1,49 @@
+from djocker.config import config
+from djocker.utils import cli
+from djocker.utils.catalog import ImageCatalog
+from djocker.utils.colors import Colors, color
+from djocker.utils.docker_index import DockerIndex
+
+DEFAULT_REPOSITORIES = [
+    'ubuntu',
+    'postgres',
+    'mysql',
+    'mariadb',
+    'redis',
+    'memcached',
+]
+
+
+class ExportImageCatalog(cli.Command):
+    description = 'Export repository tags from a Docker index into a local image catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('repositories', nargs='*', default=DEFAULT_REPOSITORIES)
+        parser.add_argument('--catalog', default=config.image_catalog,
+                            help='Path of the catalog file to write')
+        parser.add_argument('--index-url', default=None,
+                            help='Base URL of the Docker index to export from')
+
+    def handle(self, *args, **options):
+        client = DockerIndex(refresh=True, base_url=self.args.index_url)
+        catalog = ImageCatalog(self.args.catalog, create=True)
+
+        for repo_name in self.args.repositories:
+            print("Exporting {}... ".format(repo_name), end="", flush=True)
+            tags = client.repo_tags(repo_name)
+            if not tags:
+                print(color("no tags found", Colors.WARNING))
+                continue
+            catalog.add_repo(repo_name, tags)
+            print(color("{} tags".format(len(tags)), Colors.OKGREEN))
+
+        catalog.close()
+        print('Image catalog written to {}'.format(color(self.args.catalog, Colors.HEADER)))
+
+
+def main():
+    cli.run_command(ExportImageCatalog)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,26 @@
+import os
 import sys
-from subprocess import call
 
 from djocker.config import config
 from djocker.utils import cli
 
+# Options understood by manage_with_compose itself, given before the management command
+FAN_OUT_OPTIONS = ('--services', '--all-replicas', '--jobs')
+
+DEFAULT_FAN_OUT_JOBS = 4
+
 
 class ManageWithCompose(cli.Command):
     def get_management_args(self):
-        return ' '.join(self.argv[1:])
+        return ' '.join(self.management_argv)
 
     def add_arguments(self, parser):
+        parser.add_argument('--services', default=None,
+                            help='Comma separated compose services to run the command in concurrently')
+        parser.add_argument('--all-replicas', action='store_true',
+                            help='Run the command in every running container of each service')
+        parser.add_argument('--jobs', type=int, default=DEFAULT_FAN_OUT_JOBS,
+                            help='Maximum number of commands to run at the same time')
         parser.add_argument('command', nargs='+')
 
     def get_args(self):
@@ -20,18 +31,166 @@ class ManageWithCompose(cli.Command):
         # Do not handle anything with ArgumentParser unless it is the help
         return None
 
-    def handle(self, *args, **options):
-        command_template = 'docker-compose exec {container_name} {python_bin} manage.py {management_command}'
-        management_command = self.get_management_args()
+    def parse_fan_out_options(self):
+        """
+        Split the fan-out options off the start of the arguments, everything
+        after them is passed on to manage.py untouched.
+        """
+        argv = list(self.argv[1:])
+        options = {
+            'services': None,
+            'all_replicas': False,
+            'jobs': DEFAULT_FAN_OUT_JOBS,
+        }
+
+        while argv and argv[0].split('=')[0] in FAN_OUT_OPTIONS:
+            option, _, value = argv.pop(0).partition('=')
+            if option == '--all-replicas':
+                options['all_replicas'] = True
+                continue
+            if not value and argv:
+                value = argv.pop(0)
+            if option == '--services':
+                options['services'] = [service for service in value.split(',') if service]
+                if not options['services']:
+                    self.usage_error('argument --services: expected a comma separated list of services')
+            else:
+                options['jobs'] = self.parse_jobs(value)
+
+        self.management_argv = argv
+        return options
+
+    def parse_jobs(self, value):
+        try:
+            jobs = int(value)
+        except ValueError:
+            jobs = 0
+        if jobs < 1:
+            self.usage_error('argument --jobs: expected a positive integer, got {!r}'.format(value))
+        return jobs
+
+    def usage_error(self, message):
+        """
+        Exit with the usage and the error, like ArgumentParser does for the options it parses.
+        """
+        import argparse
 
+        parser = argparse.ArgumentParser(prog=os.path.basename(self.argv[0]))
+        self.add_arguments(parser)
+        parser.error(message)
+
+    def use_command_server(self):
+        return str(config.command_server).lower() in ('1', 'on', 'yes', 'true')
+
+    def get_command(self, management_command, service=None, index=None, tty=True):
+        exec_options = ''
+        if not tty:
+            exec_options += '-T '
+        if index:
+            exec_options += '--index={} '.format(index)
+        container_name = '{}{}'.format(exec_options, service or config.compose_service_name)
+
+        command_template = 'docker-compose exec {container_name} {python_bin} manage.py {management_command}'
         command = command_template.format(
-            container_name=config.compose_service_name,
+            container_name=container_name,
             python_bin=config.python_bin,
             management_command=management_command,
         )
-        print("Running command: {}".format(command))
 
-        call(command, shell=True)
+        if not self.use_command_server():
+            return command
+
+        from djocker.command_server import FALLBACK_EXIT_CODE
+
+        # Try the warm command server first and run manage.py directly if it
+        # is not running or can not handle the command
+        server_template = (
+            'docker-compose exec {container_name} {python_bin} -m djocker.command_server run '
+            '--socket {socket} -- {management_command}; '
+            'status=$?; if [ $status -eq {fallback_exit_code} ]; then exec {command}; fi; exit $status'
+        )
+        return server_template.format(
+            container_name=container_name,
+            python_bin=config.python_bin,
+            socket=config.command_server_socket,
+            management_command=management_command,
+            fallback_exit_code=FALLBACK_EXIT_CODE,
+            command=command,
+        )
+
+    def get_fan_out_targets(self, services, all_replicas):
+        """
+        Return ``(label, service, index)`` for every container to run in.
+        """
+        from subprocess import check_output
+
+        targets = []
+        for service in services:
+            if not all_replicas:
+                targets.append((service, service, None))
+                continue
+            container_ids = check_output(['docker-compose', 'ps', '-q', service], universal_newlines=True).split()
+            for index in range(1, len(container_ids) + 1):
+                targets.append(('{}.{}'.format(service, index), service, index))
+        return targets
+
+    def run_target(self, label, command, print_lock):
+        import time
+        from subprocess import PIPE, STDOUT, Popen
+
+        from djocker.utils.colors import Colors, color
+
+        prefix = color('[{}]'.format(label), Colors.OKBLUE)
+        start = time.time()
+        process = Popen(command, shell=True, stdout=PIPE, stderr=STDOUT, universal_newlines=True)
+        for line in process.stdout:
+            with print_lock:
+                print('{} {}'.format(prefix, line), end='', flush=True)
+        return label, process.wait(), time.time() - start
+
+    def fan_out(self, options):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
+        from djocker.utils.colors import Colors, color
+
+        services = options['services'] or [config.compose_service_name]
+        targets = self.get_fan_out_targets(services, options['all_replicas'])
+        if not targets:
+            print(color('No running containers found for {}'.format(', '.join(services)), Colors.WARNING))
+            return 1
+
+        management_command = self.get_management_args()
+        print("Running command in {}: {}".format(', '.join(label for label, _, _ in targets), management_command))
+
+        print_lock = threading.Lock()
+        with ThreadPoolExecutor(max_workers=options['jobs']) as executor:
+            futures = [
+                executor.submit(self.run_target, label,
+                                self.get_command(management_command, service, index, tty=False), print_lock)
+                for label, service, index in targets
+            ]
+            results = [future.result() for future in futures]
+
+        print('')
+        exit_code = 0
+        for label, return_code, duration in results:
+            status = color('OK', Colors.OKGREEN) if return_code == 0 else color('FAIL', Colors.FAIL)
+            print('{} {} exit code {} ({:.2f}s)'.format(status, label, return_code, duration))
+            exit_code = exit_code or return_code
+        return exit_code
+
+    def handle(self, *args, **options):
+        fan_out_options = self.parse_fan_out_options()
+        if fan_out_options['services'] or fan_out_options['all_replicas']:
+            sys.exit(self.fan_out(fan_out_options))
+
+        command = self.get_command(self.get_management_args())
+        print("Running command: {}".format(command), flush=True)
+
+        # Replace this process with the shell rather than waiting on a child,
+        # which also passes the exit code of the command through
+        os.execvp('/bin/sh', ['/bin/sh', '-c', command])
 
 
 def main():
@@ -0,0 +1,59 @@
+import os
+import sqlite3
+import time
+
+
+class CatalogError(Exception):
+    pass
+
+
+class ImageCatalog:
+    """
+    Local snapshot of repository tags stored in an SQLite file.
+
+    Used instead of the Docker index when running offline, which also makes
+    the answers offered by ``dockerize`` reproducible.
+    """
+
+    def __init__(self, path, create=False):
+        if not create and not os.path.isfile(path):
+            raise CatalogError('No image catalog found at {}'.format(path))
+
+        self.path = path
+        if create and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        if create:
+            self._create_tables()
+
+    def _create_tables(self):
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS repositories (repo TEXT PRIMARY KEY, exported REAL)'
+            )
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS tags (repo TEXT, tag TEXT, PRIMARY KEY (repo, tag)) WITHOUT ROWID'
+            )
+
+    def repositories(self):
+        return [row[0] for row in self.connection.execute('SELECT repo FROM repositories ORDER BY repo')]
+
+    def repo_tags(self, repo_name):
+        rows = self.connection.execute('SELECT tag FROM tags WHERE repo = ?', (repo_name,)).fetchall()
+        return [row[0] for row in rows] or None
+
+    def add_repo(self, repo_name, tags):
+        with self.connection:
+            self.connection.execute('DELETE FROM tags WHERE repo = ?', (repo_name,))
+            self.connection.executemany(
+                'INSERT OR IGNORE INTO tags (repo, tag) VALUES (?, ?)',
+                ((repo_name, tag) for tag in tags)
+            )
+            self.connection.execute(
+                'INSERT OR REPLACE INTO repositories (repo, exported) VALUES (?, ?)',
+                (repo_name, time.time())
+            )
+
+    def close(self):
+        self.connection.close()
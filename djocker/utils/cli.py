@@ -1,4 +1,3 @@
-import argparse
 import sys
 
 
@@ -8,6 +7,9 @@ class Command:
         self.args = self.get_args()
 
     def get_args(self):
+        # Imported here so that commands which skip argument parsing start faster
+        import argparse
+
         parser = argparse.ArgumentParser(description=getattr(self, 'description', ''))
         self.add_arguments(parser)
         return parser.parse_args()
@@ -1,87 +1,261 @@
-import re
+import hashlib
+import json
+import math
+import os
+import tempfile
+import time
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from djocker.config import config
+from djocker.utils.versions import VersionIndex
+
+
+class DockerIndexCache:
+    """
+    Stores the tag list of each repository as a JSON file on disk, in a
+    directory of its own for every index so that mirrors do not mix.
+
+    Entries older than ``ttl`` seconds are considered stale, but are kept
+    around so that they can be revalidated using their ETag.
+    """
+
+    def __init__(self, cache_dir=None, ttl=None):
+        self.cache_dir = cache_dir or config.index_cache_dir
+        self.ttl = int(ttl if ttl is not None else config.index_cache_ttl)
+
+    def _get_index_dir(self, index_url):
+        return os.path.join(self.cache_dir, hashlib.sha1(index_url.encode('utf-8')).hexdigest()[:16])
+
+    def _get_path(self, index_url, repo_name):
+        return os.path.join(self._get_index_dir(index_url), '{}.json'.format(repo_name.replace('/', '__')))
+
+    def get(self, index_url, repo_name):
+        try:
+            with open(self._get_path(index_url, repo_name), 'r') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('index_url') == index_url else None
+
+    def is_fresh(self, entry):
+        return time.time() - entry.get('fetched', 0) < self.ttl
+
+    def set(self, index_url, repo_name, tags, etag=None):
+        entry = {
+            'index_url': index_url,
+            'fetched': time.time(),
+            'etag': etag,
+            'tags': tags,
+        }
+
+        try:
+            index_dir = self._get_index_dir(index_url)
+            os.makedirs(index_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=index_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as file:
+                json.dump(entry, file)
+            os.replace(temp_path, self._get_path(index_url, repo_name))
+        except OSError:
+            # Failing to cache should never prevent the lookup itself
+            pass
+
+        return entry
 
 
 class DockerIndex:
-    def __init__(self):
-        self.baseURL = 'https://index.docker.io/v1'
+    max_workers = 8
+
+    def __init__(self, cache=None, refresh=False, base_url=None):
+        self.baseURL = base_url or 'https://index.docker.io/v1'
+        self.cache = cache if cache is not None else DockerIndexCache()
+        self.refresh = refresh
+        self.session = self._get_session()
+        self._repo_tags = {}
+        self._prefetched = {}
+        self._prefetch_executor = None
+
+    def _get_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def get_url(self, endpoint):
+        return '{}{}'.format(self.baseURL, endpoint)
 
     def get_endpoint(self, endpoint):
-        url = '{}{}'.format(self.baseURL, endpoint)
-        return self.do_request(url)
+        return self.do_request(self.get_url(endpoint))
+
+    def get_json(self, url):
+        return self.session.get(url).json()
+
+    def _get_page_urls(self, page):
+        """
+        Build the URLs of all remaining pages from the first one.
+
+        Returns ``None`` if the page count can not be determined, in which case
+        the ``next`` links have to be followed one by one.
+        """
+        next_url = page.get('next')
+        page_size = len(page.get('results', []))
+        count = page.get('count')
+        if not next_url or not page_size or not count:
+            return None
+
+        parts = urlparse(next_url)
+        query = parse_qs(parts.query)
+        if 'page' not in query:
+            return None
+
+        first_page = int(query['page'][0])
+        num_pages = int(math.ceil(count / page_size))
+        if num_pages < first_page:
+            # The count changed since the first page was served
+            return None
+
+        urls = []
+        for page_number in range(first_page, num_pages + 1):
+            query['page'] = [str(page_number)]
+            urls.append(urlunparse(parts._replace(query=urlencode(query, doseq=True))))
+        return urls
+
+    def iter_pages(self, url, first_page=None):
+        """
+        Yield every page of a paginated endpoint in order.
 
-    def do_request(self, url, results=None):
-        if not results:
-            results = []
+        Once the first page tells how many pages there are, the rest are
+        fetched concurrently over the pooled session.
+        """
+        page = first_page if first_page is not None else self.get_json(url)
+        yield page
 
-        response = requests.get(url)
-        response = response.json()
+        if not isinstance(page, dict) or not page.get('next'):
+            return
 
-        results = results + response['results'] if 'results' in response else response
+        page_urls = self._get_page_urls(page)
+        if page_urls:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(page_urls))) as executor:
+                for page in executor.map(self.get_json, page_urls):
+                    yield page
 
-        if 'next' in response and response['next']:
-            self.do_request(response['next'], results)
-        else:
-            return results
+        # Follow the next links when the page count is unknown, or when pages
+        # were added after the count was read
+        while isinstance(page, dict) and page.get('next'):
+            page = self.get_json(page['next'])
+            yield page
+
+    def do_request(self, url, first_page=None):
+        results = []
+        for page in self.iter_pages(url, first_page):
+            if not isinstance(page, dict) or 'results' not in page:
+                return page
+            results += page['results']
+        return results
+
+    def fetch_repo_tags(self, repo_name, etag=None):
+        """
+        Fetch the tags of a repository from the index.
+
+        Returns a ``(tags, etag)`` tuple. When ``etag`` is given and the index
+        reports that nothing has changed, ``tags`` is ``None`` and the caller
+        should keep using its cached copy.
+        """
+        url = self.get_url('/repositories/{}/tags'.format(repo_name))
+        headers = {'If-None-Match': etag} if etag else {}
+
+        response = self.session.get(url, headers=headers)
+        if response.status_code == 304:
+            return None, etag
+        if response.status_code != 200:
+            return [], None
+
+        result = self.do_request(url, first_page=response.json())
+        if not isinstance(result, list):
+            return [], None
+
+        return [tag['name'] for tag in result], response.headers.get('ETag')
+
+    def _load_repo_tags(self, repo_name):
+        entry = self.cache.get(self.baseURL, repo_name)
+        if entry and not self.refresh and self.cache.is_fresh(entry):
+            return entry['tags']
+
+        tags, etag = self.fetch_repo_tags(repo_name, entry.get('etag') if entry else None)
+        if tags is None:
+            tags = entry['tags']
+        if tags:
+            self.cache.set(self.baseURL, repo_name, tags, etag)
+
+        return tags or None
+
+    def prefetch(self, *repo_names):
+        """
+        Start loading the tags of the given repositories in the background.
+
+        A later ``repo_tags`` call for the same repository waits for the
+        prefetch instead of starting a second lookup.
+        """
+        for repo_name in repo_names:
+            if not repo_name or repo_name in self._repo_tags or repo_name in self._prefetched:
+                continue
+            if self._prefetch_executor is None:
+                self._prefetch_executor = ThreadPoolExecutor(max_workers=3)
+            self._prefetched[repo_name] = self._prefetch_executor.submit(self._load_repo_tags, repo_name)
 
     def repo_tags(self, repo_name):
-        endpoint = '/repositories/{}/tags'.format(repo_name)
-        result = self.get_endpoint(endpoint)
-        if isinstance(result, list):
-            return [tag['name'] for tag in result]
-        return None
+        if repo_name in self._repo_tags:
+            return self._repo_tags[repo_name]
+
+        future = self._prefetched.pop(repo_name, None)
+        tags = None
+        if future is not None:
+            try:
+                tags = future.result()
+            except Exception:
+                # Retry in the foreground so that errors surface as usual
+                future = None
+        if future is None:
+            tags = self._load_repo_tags(repo_name)
+
+        self._repo_tags[repo_name] = tags
+        return tags
+
+    def get_version_index(self, repo_name):
+        return VersionIndex(self.repo_tags(repo_name) or [])
 
     def get_latest_version_tags(self, repo_name):
         flavor_lookups = [
             'alpine'
         ]
 
-        client = DockerIndex()
-        tags = client.repo_tags(repo_name)
-        version_lists = {}
-        clean_version_tags = [tag for tag in tags if tag.replace('.', '').isdigit()]
-        clean_version_tags.sort(reverse=True)
-
-        for version in clean_version_tags:
-            major_version = version
-            minor_version = None
-
-            # Extract the major version from versions with dots
-            if '.' in version:
-                version_split = major_version.split('.')
-                major_version = version_split[0]
-                minor_version = version_split[1]
+        version_index = self.get_version_index(repo_name)
 
-            # Cast versions to integer for easier sorting
-            major_version = int(major_version)
+        flavor_dict = OrderedDict()
+        for version in version_index.latest_per_minor():
+            available_flavors = version_index.flavors_for(version)
+            flavor_dict[version] = [flavor for flavor in flavor_lookups if flavor in available_flavors]
 
-            # Get the to latest versions of each major version
-            if major_version not in version_lists:
-                version_lists[major_version] = []
+        return flavor_dict
 
-            # Include the latest minor version of each major version
-            re_check = r'{}\.{}.*'.format(major_version, minor_version)
-            already_in_list = any(
-                re.match(re_check, included_version) for included_version in version_lists[major_version]
-            )
-            if not already_in_list and minor_version:
-                version_lists[major_version].append(version)
 
-        # Order the major versions
-        sorted_version_mapping = OrderedDict(sorted(version_lists.items(), reverse=True))
+class OfflineDockerIndex(DockerIndex):
+    """
+    Answers every lookup from a local ``ImageCatalog`` without touching the network.
+    """
 
-        # Create a list of versions
-        sorted_version_list = sum(sorted_version_mapping.values(), [])
+    def __init__(self, catalog):
+        super().__init__(cache=False)
+        self.catalog = catalog
 
-        flavor_dict = OrderedDict()
-        for version in sorted_version_list:
-            if version not in flavor_dict:
-                flavor_dict.update({version: []})
+    def _load_repo_tags(self, repo_name):
+        return self.catalog.repo_tags(repo_name)
 
-            for flavor in flavor_lookups:
-                if "{}-{}".format(version, flavor) in tags:
-                    flavor_dict[version].append(flavor)
-
-        return flavor_dict
+    def prefetch(self, *repo_names):
+        # Catalog lookups are fast enough to not be worth a thread
+        pass
@@ -1,9 +1,33 @@
 import os
+import stat
+from pathlib import Path
 
 
-def find_filename(name, path):
-    matches = []
-    for root, dirs, files in os.walk(path):
-        if name in files:
-            matches.append(os.path.join(root, name))
-    return matches
+def _get_umask():
+    # The umask can only be read by setting it, so do it once before any threads start
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+UMASK = _get_umask()
+
+
+def get_relative_dotted_path(path, relative_to_path):
+    # Get path relative to the root of the project
+    relative_path = Path(path).relative_to(relative_to_path)
+
+    # Create module path
+    return str(relative_path).replace('/', '.').replace('.py', '')
+
+
+def get_file_mode(path, executable=False):
+    """
+    Return the mode to give a file written at ``path``: the mode of the
+    existing file, or the default one for new files under the umask.
+    """
+    exec_bits = 0o111 & ~UMASK if executable else 0
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode) | exec_bits
+    except OSError:
+        return (0o666 & ~UMASK) | exec_bits
@@ -0,0 +1,158 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+REQUIREMENTS_RE = re.compile(r'requirements.*\.txt')
+SETTINGS_MODULE_RE = re.compile(r'DJANGO_SETTINGS_MODULE\W+([\w.]+)')
+
+# File names collected while scanning a project
+INDEXED_FILENAMES = {
+    'wsgi.py',
+    'asgi.py',
+    'manage.py',
+    'settings.py',
+}
+
+# Key of settings split into a package in the index, which holds the package directories
+SETTINGS_PACKAGE = 'settings'
+
+# Directories that never contain project code
+PRUNED_DIRECTORIES = {
+    '.git',
+    '.hg',
+    '.svn',
+    '__pycache__',
+    'node_modules',
+    '.tox',
+    '.nox',
+    '.venv',
+    'venv',
+    '.mypy_cache',
+    '.pytest_cache',
+    'htmlcov',
+    'site-packages',
+}
+
+
+def list_dir(path):
+    """
+    Return ``(name, path, is_dir)`` for the entries of a directory, with
+    symlinks not counted as directories. ``os.scandir`` is only used where
+    it is available, as it was added in Python 3.5.
+    """
+    if hasattr(os, 'scandir'):
+        return [(entry.name, entry.path, entry.is_dir(follow_symlinks=False)) for entry in os.scandir(path)]
+
+    entries = []
+    for name in os.listdir(path):
+        entry_path = os.path.join(path, name)
+        entries.append((name, entry_path, os.path.isdir(entry_path) and not os.path.islink(entry_path)))
+    return entries
+
+
+class ProjectIndex:
+    """
+    Index of the files of a project that dockerize cares about.
+
+    The tree is scanned once, skipping VCS data, caches and virtualenvs. With
+    ``workers`` set, the top level directories are scanned in parallel
+    threads.
+    """
+
+    def __init__(self, base_dir, workers=None):
+        self.base_dir = base_dir
+        self.files = {}
+        self.requirements = []
+        self._scan(workers)
+
+    def _scan_entries(self, entries):
+        """
+        Return the interesting files among the entries of a directory, and
+        the sub directories to scan.
+        """
+        files = []
+        sub_dirs = []
+        for name, path, is_dir in entries:
+            if is_dir:
+                if name not in PRUNED_DIRECTORIES:
+                    sub_dirs.append(path)
+            elif name in INDEXED_FILENAMES:
+                files.append((name, path))
+            elif name == '__init__.py' and os.path.basename(os.path.dirname(path)) == SETTINGS_PACKAGE:
+                files.append((SETTINGS_PACKAGE, os.path.dirname(path)))
+        return files, sub_dirs
+
+    def _scan_dir(self, path):
+        """Scan a directory tree and return the interesting files found in it."""
+        files = []
+        stack = [path]
+
+        while stack:
+            try:
+                entries = list_dir(stack.pop())
+            except OSError:
+                continue
+
+            if any(name == 'pyvenv.cfg' for name, entry_path, is_dir in entries):
+                # Skip virtualenvs regardless of their name
+                continue
+
+            dir_files, sub_dirs = self._scan_entries(entries)
+            files += dir_files
+            stack += sub_dirs
+
+        return files
+
+    def _scan(self, workers):
+        try:
+            root_entries = list_dir(self.base_dir)
+        except OSError:
+            return
+
+        root_files, sub_dirs = self._scan_entries(root_entries)
+        self.requirements = sorted(name for name, path, is_dir in root_entries
+                                   if not is_dir and REQUIREMENTS_RE.match(name))
+
+        if workers and workers > 1 and len(sub_dirs) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self._scan_dir, sub_dirs))
+        else:
+            results = [self._scan_dir(sub_dir) for sub_dir in sub_dirs]
+
+        for name, path in root_files + [item for files in results for item in files]:
+            self.files.setdefault(name, []).append(path)
+        for paths in self.files.values():
+            paths.sort()
+
+    def find(self, name, within=None):
+        """
+        Return the paths of all indexed files called ``name``, optionally only
+        those inside the ``within`` directory.
+        """
+        paths = self.files.get(name, [])
+        if within:
+            prefix = os.path.join(os.path.abspath(within), '')
+            paths = [path for path in paths if os.path.abspath(path).startswith(prefix)]
+        return list(paths)
+
+    def requirements_files(self):
+        """Return the names of the requirements files in the project root."""
+        return list(self.requirements)
+
+    def settings_modules(self):
+        """Return the dotted paths of all settings modules and packages."""
+        paths = [path[:-len('.py')] for path in self.find('settings.py')] + self.find(SETTINGS_PACKAGE)
+        return sorted(os.path.relpath(path, self.base_dir).replace(os.sep, '.') for path in paths)
+
+    def default_settings_module(self):
+        """Return the settings module manage.py defaults to, or ``None``."""
+        # The shallowest manage.py is the one of the project itself
+        for path in sorted(self.find('manage.py'), key=lambda path: path.count(os.sep)):
+            try:
+                with open(path, 'r') as file:
+                    match = SETTINGS_MODULE_RE.search(file.read())
+            except OSError:
+                continue
+            if match:
+                return match.group(1)
+        return None
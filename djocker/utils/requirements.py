@@ -0,0 +1,140 @@
+import os
+import re
+from collections import OrderedDict
+
+NAME_RE = re.compile(r'^([A-Za-z0-9][A-Za-z0-9._-]*)')
+EGG_RE = re.compile(r'[#&]egg=([A-Za-z0-9][A-Za-z0-9._-]*)')
+
+INCLUDE_OPTIONS = ('-r', '--requirement')
+CONSTRAINT_OPTIONS = ('-c', '--constraint')
+EDITABLE_OPTIONS = ('-e', '--editable')
+
+
+class RequirementsError(Exception):
+    pass
+
+
+def normalize_name(name):
+    """Normalize a package name as described in PEP 503."""
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+class Requirement:
+    def __init__(self, name, line, source):
+        self.name = normalize_name(name)
+        self.line = line
+        self.source = source
+
+    def __repr__(self):
+        return '<Requirement {} from {}>'.format(self.name, self.source)
+
+
+class ParsedRequirements:
+    """
+    Result of parsing a set of requirements files and everything they include.
+
+    ``requirements`` and ``constraints`` map normalized package names to
+    ``Requirement`` objects, ``files`` lists every file that was read.
+    """
+
+    def __init__(self):
+        self.requirements = OrderedDict()
+        self.constraints = OrderedDict()
+        self.files = []
+
+    def __contains__(self, name):
+        return normalize_name(name) in self.requirements
+
+    def names(self):
+        return list(self.requirements.keys())
+
+
+def _logical_lines(content):
+    """Yield lines with comments stripped and continuations joined."""
+    buffer = ''
+    for line in content.splitlines():
+        if line.endswith('\\'):
+            buffer += line[:-1]
+            continue
+        line = buffer + line
+        buffer = ''
+        line = re.sub(r'(^|\s)#.*$', '', line).strip()
+        if line:
+            yield line
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _split_option(line, options):
+    for option in options:
+        if line == option:
+            return ''
+        if line.startswith(option + ' ') or line.startswith(option + '='):
+            return line[len(option) + 1:].strip()
+        if not option.startswith('--') and line.startswith(option):
+            return line[len(option):].strip()
+    return None
+
+
+def _get_requirement_name(line):
+    egg = EGG_RE.search(line)
+    if egg:
+        return egg.group(1)
+    if '://' in line or line.startswith(('.', '/')):
+        # Plain URLs and paths do not tell the package name
+        return None
+    match = NAME_RE.match(line)
+    return match.group(1) if match else None
+
+
+def _parse_file(path, result, is_constraint, seen):
+    path = os.path.abspath(path)
+    if path in seen:
+        return
+    seen.add(path)
+
+    try:
+        with open(path, 'r') as file:
+            content = file.read()
+    except OSError as e:
+        raise RequirementsError('Could not read requirements file {}: {}'.format(path, e))
+
+    result.files.append(path)
+    target = result.constraints if is_constraint else result.requirements
+    file_dir = os.path.dirname(path)
+
+    for line in _logical_lines(content):
+        include = _split_option(line, INCLUDE_OPTIONS)
+        if include is not None:
+            _parse_file(os.path.join(file_dir, include), result, is_constraint, seen)
+            continue
+
+        constraint = _split_option(line, CONSTRAINT_OPTIONS)
+        if constraint is not None:
+            _parse_file(os.path.join(file_dir, constraint), result, True, seen)
+            continue
+
+        editable = _split_option(line, EDITABLE_OPTIONS)
+        if editable is not None:
+            line = editable
+        elif line.startswith('-'):
+            # Other options such as --index-url do not name packages
+            continue
+
+        name = _get_requirement_name(line)
+        if name:
+            requirement = Requirement(name, line, path)
+            target.setdefault(requirement.name, requirement)
+
+
+def parse_requirements(paths):
+    """
+    Parse requirements files, following ``-r`` and ``-c`` includes.
+
+    Returns a ``ParsedRequirements`` covering all of the given files.
+    """
+    result = ParsedRequirements()
+    seen = set()
+    for path in paths:
+        _parse_file(path, result, False, seen)
+    return result
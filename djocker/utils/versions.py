@@ -0,0 +1,80 @@
+import re
+from collections import OrderedDict
+
+VERSION_TAG_RE = re.compile(r'^(\d+(?:\.\d+)*)(?:-([A-Za-z0-9._-]+))?$')
+
+
+def parse_version_tag(tag):
+    """
+    Split a tag such as ``9.6.10-alpine`` into ``((9, 6, 10), 'alpine')``.
+
+    Returns ``None`` for tags that do not start with a numeric version.
+    """
+    match = VERSION_TAG_RE.match(tag)
+    if not match:
+        return None
+    version, flavor = match.groups()
+    return tuple(int(part) for part in version.split('.')), flavor
+
+
+class VersionIndex:
+    """
+    Index of the numeric version tags of a repository, built in one pass.
+
+    Versions are grouped by major and minor version and compared as integer
+    tuples, so ``10.1`` sorts above ``9.6``.
+    """
+
+    def __init__(self, tags):
+        # Version string -> numeric tuple for plain version tags
+        self.versions = {}
+        # Version string -> set of flavors available for it
+        self.flavors = {}
+        # Major -> minor -> (numeric tuple, version string) of the latest patch
+        self.by_major = {}
+
+        for tag in tags:
+            parsed = parse_version_tag(tag)
+            if not parsed:
+                continue
+            numbers, flavor = parsed
+            version = tag.split('-', 1)[0]
+
+            if flavor:
+                self.flavors.setdefault(version, set()).add(flavor)
+                continue
+
+            self.versions[version] = numbers
+            if len(numbers) < 2:
+                continue
+
+            minors = self.by_major.setdefault(numbers[0], {})
+            current = minors.get(numbers[1])
+            if current is None or numbers > current[0]:
+                minors[numbers[1]] = (numbers, version)
+
+        self._latest_per_minor = OrderedDict()
+        for major in sorted(self.by_major, reverse=True):
+            minors = self.by_major[major]
+            self._latest_per_minor[major] = [minors[minor][1] for minor in sorted(minors, reverse=True)]
+
+    def __contains__(self, version):
+        return version in self.versions
+
+    def latest(self, major, minor):
+        """Return the latest patch version of ``major.minor``, or ``None``."""
+        entry = self.by_major.get(major, {}).get(minor)
+        return entry[1] if entry else None
+
+    def latest_per_minor(self, major=None):
+        """
+        Return the latest patch version of every minor version, newest first.
+
+        Limited to a single major version if ``major`` is given.
+        """
+        if major is not None:
+            return list(self._latest_per_minor.get(major, []))
+        return [version for versions in self._latest_per_minor.values() for version in versions]
+
+    def flavors_for(self, version):
+        return self.flavors.get(version, set())
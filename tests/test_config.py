@@ -0,0 +1,32 @@
+import os
+
+from djocker.config import get_config_values
+
+
+def write_config(path, values, mtime):
+    lines = ['[djocker]'] + ['{} = {}'.format(key, value) for key, value in values.items()]
+    path.write('\n'.join(lines) + '\n')
+    os.utime(str(path), (mtime, mtime))
+
+
+def test_cache_is_invalidated_by_size(tmpdir, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmpdir.join('cache')))
+    monkeypatch.chdir(tmpdir)
+
+    write_config(tmpdir.join('setup.cfg'), {'python_bin': 'python3'}, 1000000)
+    assert get_config_values() == {'python_bin': 'python3'}
+
+    # Edited within the timestamp resolution of the file system
+    write_config(tmpdir.join('setup.cfg'), {'python_bin': 'python3.8'}, 1000000)
+    assert get_config_values() == {'python_bin': 'python3.8'}
+
+
+def test_cache_is_kept_per_project(tmpdir, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmpdir.join('cache')))
+    write_config(tmpdir.mkdir('a__b').join('setup.cfg'), {'compose_service_name': 'web'}, 1000000)
+    write_config(tmpdir.mkdir('a').mkdir('b').join('setup.cfg'), {'compose_service_name': 'api'}, 1000000)
+
+    monkeypatch.chdir(tmpdir.join('a__b'))
+    assert get_config_values() == {'compose_service_name': 'web'}
+    monkeypatch.chdir(tmpdir.join('a', 'b'))
+    assert get_config_values() == {'compose_service_name': 'api'}
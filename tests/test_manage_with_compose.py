@@ -0,0 +1,29 @@
+import pytest
+
+from djocker.scripts.manage_with_compose import ManageWithCompose
+
+
+def parse(monkeypatch, *argv):
+    monkeypatch.setattr('sys.argv', ['manage_with_compose'] + list(argv))
+    command = ManageWithCompose()
+    return command.parse_fan_out_options(), command.management_argv
+
+
+def test_fan_out_options(monkeypatch):
+    options, management_argv = parse(monkeypatch, '--services=api,worker', '--jobs', '2', 'migrate', '--jobs')
+
+    assert options == {'services': ['api', 'worker'], 'all_replicas': False, 'jobs': 2}
+    assert management_argv == ['migrate', '--jobs']
+
+
+@pytest.mark.parametrize('argv', [
+    ('--jobs', 'x', 'check'),
+    ('--jobs=0', 'check'),
+    ('--services', ',', 'check'),
+])
+def test_invalid_fan_out_options(monkeypatch, capsys, argv):
+    with pytest.raises(SystemExit) as excinfo:
+        parse(monkeypatch, *argv)
+
+    assert excinfo.value.code == 2
+    assert 'usage: manage_with_compose' in capsys.readouterr().err
@@ -0,0 +1,88 @@
+import pytest
+
+from djocker.dockerize.utils.packages import get_system_packages
+from djocker.utils.requirements import (
+    RequirementsError,
+    normalize_name,
+    parse_requirements,
+)
+
+PACKAGE_MAP = {
+    'cffi': {'build': ['libffi-dev'], 'runtime': []},
+    'python-magic': {'build': [], 'runtime': ['libmagic1']},
+    'cryptography': {'build': ['libssl-dev', 'libffi-dev'], 'runtime': []},
+}
+
+
+def write_requirements(tmpdir, name, content):
+    path = tmpdir.join(name)
+    path.write(content)
+    return str(path)
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('Django', 'django'),
+    ('python_ldap', 'python-ldap'),
+    ('zope.interface', 'zope-interface'),
+    ('Foo__Bar--baz', 'foo-bar-baz'),
+])
+def test_normalize_name(name, expected):
+    assert normalize_name(name) == expected
+
+
+def test_parse_requirement_lines(tmpdir):
+    path = write_requirements(tmpdir, 'requirements.txt', '\n'.join([
+        '# A comment',
+        'Django>=1.11,<2.1  # Inline comment',
+        'psycopg2-binary==2.7.5 \\',
+        '    --hash=sha256:abc',
+        '--index-url https://pypi.example.com/simple',
+        '-e git+https://github.com/example/project.git#egg=Example_Project',
+        'https://example.com/packages/archive.zip',
+        'Pillow[jpeg]; python_version >= "3.4"',
+    ]))
+
+    result = parse_requirements([path])
+
+    assert result.names() == ['django', 'psycopg2-binary', 'example-project', 'pillow']
+    assert result.files == [path]
+    assert 'Example.Project' in result
+
+
+def test_parse_includes_and_constraints(tmpdir):
+    tmpdir.mkdir('requirements')
+    base = write_requirements(tmpdir, 'requirements/base.txt', 'requests\n-c constraints.txt\n')
+    constraints = write_requirements(tmpdir, 'requirements/constraints.txt', 'lxml==4.2.1\n')
+    path = write_requirements(tmpdir, 'requirements.txt', '-r requirements/base.txt\n--requirement=dev.txt\n')
+    dev = write_requirements(tmpdir, 'dev.txt', 'pytest\n-r requirements/base.txt\n')
+
+    result = parse_requirements([path])
+
+    assert result.names() == ['requests', 'pytest']
+    assert list(result.constraints.keys()) == ['lxml']
+    # Constrained packages are not installed unless they are required
+    assert 'lxml' not in result
+    # Files included more than once are read once
+    assert result.files == [path, base, constraints, dev]
+
+
+def test_parse_missing_file(tmpdir):
+    path = write_requirements(tmpdir, 'requirements.txt', '-r missing.txt\n')
+
+    with pytest.raises(RequirementsError):
+        parse_requirements([path])
+
+
+def test_system_packages_match_whole_names(tmpdir):
+    path = write_requirements(tmpdir, 'requirements.txt', 'xcffib\npython-magic-bin\n')
+
+    assert get_system_packages(PACKAGE_MAP, parse_requirements([path])) == ([], [])
+
+
+def test_system_packages_are_collected_once(tmpdir):
+    path = write_requirements(tmpdir, 'requirements.txt', 'CFFI\npython_magic\ncryptography\n')
+
+    build_packages, runtime_packages = get_system_packages(PACKAGE_MAP, parse_requirements([path]))
+
+    assert build_packages == ['libffi-dev', 'libssl-dev']
+    assert runtime_packages == ['libmagic1']
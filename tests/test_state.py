@@ -0,0 +1,83 @@
+import os
+
+from djocker.dockerize.config import DockerizeConfig
+from djocker.dockerize.handlers.base import BaseHandler, run_handlers
+from djocker.dockerize.state import STATE_FILE, GenerationState, content_hash
+
+
+class EntrypointTemplateHandler(BaseHandler):
+    template_file = 'docker-entrypoint.j2'
+    out_file = 'docker-entrypoint.sh'
+
+    def handle(self):
+        self.write_template({'dependencies': [], 'python_version': '3.6'})
+
+
+def generate(base_dir):
+    state = GenerationState.load(base_dir)
+    run_handlers([EntrypointTemplateHandler(DockerizeConfig(base_dir=base_dir))], state)
+    state.save()
+    return state
+
+
+def test_state_round_trip(tmpdir):
+    state = GenerationState(str(tmpdir), answers={'python_version': '3.6'})
+    state.record('Dockerfile', content_hash(b'FROM python'))
+    state.save()
+
+    loaded = GenerationState.load(str(tmpdir))
+
+    assert loaded.answers == {'python_version': '3.6'}
+    assert loaded.files == {'Dockerfile': content_hash(b'FROM python')}
+
+
+def test_load_without_state_file(tmpdir):
+    state = GenerationState.load(str(tmpdir))
+
+    assert state.answers is None
+    assert state.files == {}
+
+
+def test_unchanged_files_are_not_written(tmpdir):
+    generate(str(tmpdir))
+    path = str(tmpdir.join('docker-entrypoint.sh'))
+    os.utime(path, (0, 0))
+
+    state = generate(str(tmpdir))
+
+    assert os.stat(path).st_mtime == 0
+    assert state.modified == []
+
+
+def test_hand_edited_files_are_kept(tmpdir):
+    generate(str(tmpdir))
+    path = tmpdir.join('docker-entrypoint.sh')
+    path.write('# Edited\n', mode='a')
+    edited = path.read()
+
+    state = generate(str(tmpdir))
+
+    assert path.read() == edited
+    assert state.modified == ['docker-entrypoint.sh']
+
+
+def test_removed_files_are_generated_again(tmpdir):
+    generate(str(tmpdir))
+    path = tmpdir.join('docker-entrypoint.sh')
+    generated = path.read()
+    path.remove()
+
+    state = generate(str(tmpdir))
+
+    assert path.read() == generated
+    assert state.modified == []
+
+
+def test_existing_files_without_state_are_overwritten(tmpdir):
+    tmpdir.join('docker-entrypoint.sh').write('#!/bin/sh\n')
+
+    state = generate(str(tmpdir))
+
+    assert tmpdir.join('docker-entrypoint.sh').read() != '#!/bin/sh\n'
+    assert state.modified == []
+    assert tmpdir.join(STATE_FILE).check()
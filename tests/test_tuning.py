@@ -0,0 +1,116 @@
+from djocker.dockerize.utils.tuning import (
+    get_application_command,
+    get_cache_command,
+    get_cache_memory,
+    get_connection_pool_sizes,
+    get_database_command,
+    get_database_settings,
+    get_tuning_profile,
+)
+
+
+def test_threaded_workers_with_enough_memory():
+    profile = get_tuning_profile(4, 8192)
+
+    assert profile['worker_class'] == 'gthread'
+    assert profile['workers'] == 5
+    assert profile['threads'] == 4
+
+
+def test_sync_workers_are_capped_by_memory():
+    profile = get_tuning_profile(2, 512)
+
+    assert profile['worker_class'] == 'sync'
+    # 2 * CPUs + 1 workers do not fit in the memory left after the reserve
+    assert profile['workers'] == 1
+    assert profile['threads'] == 1
+
+
+def test_gevent_and_asgi_workers():
+    gevent_profile = get_tuning_profile(2, 4096, requirements={'gevent'})
+    asgi_profile = get_tuning_profile(2, 4096, asynchronous=True)
+
+    assert (gevent_profile['worker_class'], gevent_profile['workers']) == ('gevent', 3)
+    assert (asgi_profile['worker_class'], asgi_profile['workers']) == ('uvicorn', 2)
+
+
+def test_application_commands():
+    profile = get_tuning_profile(4, 8192)
+
+    gunicorn = get_application_command('gunicorn', 'project.wsgi', profile)
+    uwsgi = get_application_command('uwsgi', 'project.wsgi', profile)
+
+    assert gunicorn[:2] == ['gunicorn', 'project.wsgi:application']
+    assert gunicorn[gunicorn.index('--workers') + 1] == '5'
+    assert gunicorn[gunicorn.index('--threads') + 1] == '4'
+    assert uwsgi[uwsgi.index('--module') + 1] == 'project.wsgi:application'
+    assert uwsgi[uwsgi.index('--threads') + 1] == '4'
+    assert get_application_command('unknown', 'project.wsgi', profile) is None
+
+
+def test_connection_pool_sizes():
+    threaded = get_connection_pool_sizes(get_tuning_profile(4, 8192), replicas=3)
+    asynchronous = get_connection_pool_sizes(get_tuning_profile(4, 8192, asynchronous=True))
+
+    # One server connection per thread of every replica
+    assert threaded == {'pool_size': 60, 'max_client_connections': 240}
+    assert asynchronous == {'pool_size': 40, 'max_client_connections': 160}
+
+
+def test_postgres_settings():
+    settings = get_database_settings('postgres', 4096, 'oltp')
+
+    assert settings['shared_buffers'] == '1024MB'
+    assert settings['effective_cache_size'] == '3072MB'
+    assert settings['maintenance_work_mem'] == '256MB'
+    # work_mem does not go below the minimum with many connections on little memory
+    assert settings['work_mem'] == '4MB'
+
+
+def test_mysql_settings():
+    settings = get_database_settings('mysql', 4096, 'oltp')
+
+    assert settings['innodb-buffer-pool-size'] == '2867M'
+    assert settings['innodb-buffer-pool-instances'] == 2
+    assert settings['innodb-log-file-size'] == '716M'
+
+
+def test_database_settings_without_profile():
+    assert get_database_settings('postgres', 4096, None) is None
+    assert get_database_settings('sqlite', 4096, 'oltp') is None
+    # Too little memory is raised to the minimum
+    assert get_database_settings('postgres', 100, 'dev') == get_database_settings('postgres', 256, 'dev')
+
+
+def test_database_commands():
+    settings = get_database_settings('postgres', 4096, 'oltp')
+    command = get_database_command('postgres', settings)
+
+    assert command[:3] == ['postgres', '-c', 'max_connections=300']
+    assert len(command) == 1 + 2 * len(settings)
+    assert get_database_command('mysql', {'max-connections': 300}) == ['mysqld', '--max-connections=300']
+
+
+def test_cache_memory():
+    assert get_cache_memory(8192) == 1024
+    assert get_cache_memory(256) == 64
+
+
+def test_redis_command():
+    profile = get_tuning_profile(4, 8192)
+    command = get_cache_command('redis', (6, 0), 512, profile)
+
+    assert command[command.index('--maxmemory') + 1] == '512mb'
+    assert command[command.index('--maxmemory-policy') + 1] == 'allkeys-lru'
+    assert command[command.index('--io-threads') + 1] == '3'
+    # I/O threads need Redis 6 and a few cores
+    assert '--io-threads' not in get_cache_command('redis', (5, 0), 512, profile)
+    assert '--io-threads' not in get_cache_command('redis', None, 512, profile)
+    assert '--io-threads' not in get_cache_command('redis', (6, 0), 512, get_tuning_profile(2, 8192))
+
+
+def test_memcached_command():
+    command = get_cache_command('memcached', (1, 5), 512, get_tuning_profile(4, 8192))
+
+    assert command == ['memcached', '-m', '512', '-t', '4', '-c', '1024']
+    assert get_cache_command('unknown', None, 512, get_tuning_profile(4, 8192)) is None
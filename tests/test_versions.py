@@ -0,0 +1,58 @@
+import pytest
+
+from djocker.utils.versions import VersionIndex, parse_version_tag
+
+TAGS = [
+    'latest',
+    'alpine',
+    '9.6',
+    '9.6.9',
+    '9.6.10',
+    '9.6.10-alpine',
+    '9.5.14',
+    '10',
+    '10.1',
+    '10.4',
+    '10.4-alpine',
+    '10.4-stretch',
+]
+
+
+@pytest.mark.parametrize('tag, expected', [
+    ('9.6.10', ((9, 6, 10), None)),
+    ('9.6.10-alpine', ((9, 6, 10), 'alpine')),
+    ('3.7-slim-stretch', ((3, 7), 'slim-stretch')),
+    ('10', ((10,), None)),
+    ('latest', None),
+    ('alpine3.8', None),
+])
+def test_parse_version_tag(tag, expected):
+    assert parse_version_tag(tag) == expected
+
+
+def test_latest_compares_numerically():
+    index = VersionIndex(TAGS)
+
+    assert index.latest(9, 6) == '9.6.10'
+    assert index.latest(10, 4) == '10.4'
+    assert index.latest(11, 0) is None
+
+
+def test_latest_per_minor_newest_first():
+    index = VersionIndex(TAGS)
+
+    assert index.latest_per_minor() == ['10.4', '10.1', '9.6.10', '9.5.14']
+    assert index.latest_per_minor(9) == ['9.6.10', '9.5.14']
+    assert index.latest_per_minor(8) == []
+
+
+def test_flavors_are_grouped_by_version():
+    index = VersionIndex(TAGS)
+
+    assert index.flavors_for('10.4') == {'alpine', 'stretch'}
+    assert index.flavors_for('9.6.10') == {'alpine'}
+    assert index.flavors_for('9.5.14') == set()
+    # Flavored tags do not count as plain versions
+    assert '10.4' in index
+    assert '10.4-alpine' not in index
+    assert 'latest' not in index